@@ -0,0 +1,255 @@
+"""
+Approximate Nearest Neighbour Index for Life OS RAG
+Pure NumPy IVF (inverted file): k-means centroids partition the embedding rows,
+a query only scores the rows in its nprobe closest partitions
+
+Recall/latency knob: VECTOR_ANN_NPROBE (more probes = higher recall, slower)
+Used by search_memory once the store reaches VECTOR_ANN_MIN_ITEMS (VECTOR_ANN=off disables)
+"""
+
+import os
+import time
+import numpy as np
+
+# Set VECTOR_ANN=off to always search exactly
+ANN_ENABLED = os.getenv('VECTOR_ANN', 'on').lower() != 'off'
+
+# Stores smaller than this are searched exactly (brute force is already sub-millisecond)
+ANN_MIN_ITEMS = int(os.getenv('VECTOR_ANN_MIN_ITEMS', 20000))
+
+# Partitions scanned per query - the recall/latency knob
+ANN_NPROBE = int(os.getenv('VECTOR_ANN_NPROBE', 16))
+
+
+def default_nlist(n_rows):
+    """Partition count - about sqrt(N), so partitions hold ~sqrt(N) rows each"""
+    return max(1, int(np.sqrt(n_rows)))
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit-length embedding rows
+
+    lists[p] holds the row numbers assigned to centroid p and assignment[row]
+    is the centroid of each row (-1 if not indexed). Like ResidentStore, an
+    index is never modified once built: with_rows() returns an updated copy
+    that shares the untouched lists.
+    """
+
+    def __init__(self, centroids, lists, assignment):
+        self.centroids = centroids
+        self.lists = lists
+        self.assignment = assignment
+
+    @classmethod
+    def build(cls, embeddings, nlist=None, iterations=10, sample_size=None, seed=0):
+        """
+        Train centroids with spherical k-means and assign every row
+
+        Args:
+            embeddings: (N, D) matrix of unit-length rows
+            nlist: Number of partitions (default ~sqrt(N))
+            iterations: k-means iterations
+            sample_size: Rows used for training (default 64 per partition)
+            seed: Random seed for reproducible partitions
+        """
+        n_rows = len(embeddings)
+        nlist = min(nlist or default_nlist(n_rows), n_rows)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n_rows, sample_size or nlist * 64)
+        sample = np.asarray(embeddings[np.sort(rng.choice(n_rows, sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+
+            # Empty partitions restart from a random sample row
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = sums / norms
+
+        assignment = _assign(embeddings, centroids)
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        lists = [order[bounds[p]:bounds[p + 1]] for p in range(nlist)]
+
+        return cls(centroids, lists, assignment)
+
+    def with_rows(self, rows, embeddings):
+        """
+        Copy of the index with rows (re)assigned to their nearest centroid
+        Used for incremental inserts and in-place upserts.
+
+        Args:
+            rows: Row numbers to insert or move
+            embeddings: Full matrix the rows index into (may have grown)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return self
+
+        assignment = np.full(len(embeddings), -1, dtype=np.int64)
+        assignment[:len(self.assignment)] = self.assignment
+        lists = list(self.lists)
+
+        old = assignment[rows]
+        new = _assign(embeddings[rows], self.centroids)
+
+        for partition in np.unique(old[old >= 0]):
+            moved = rows[old == partition]
+            lists[partition] = lists[partition][~np.isin(lists[partition], moved)]
+        for partition in np.unique(new):
+            lists[partition] = np.concatenate([lists[partition], rows[new == partition]])
+
+        assignment[rows] = new
+        return IVFIndex(self.centroids, lists, assignment)
+
+    def remapped(self, new_row_of):
+        """
+        Copy of the index after rows were renumbered (tombstones dropped)
+
+        Args:
+            new_row_of: Array mapping old row -> new row, -1 for dropped rows
+        """
+        lists = []
+        for members in self.lists:
+            mapped = new_row_of[members]
+            lists.append(mapped[mapped >= 0])
+
+        assignment = np.full(int(new_row_of.max()) + 1 if len(new_row_of) else 0, -1, dtype=np.int64)
+        kept = new_row_of >= 0
+        assignment[new_row_of[kept]] = self.assignment[:len(new_row_of)][kept]
+        return IVFIndex(self.centroids, lists, assignment)
+
+    def search(self, embeddings, query, k, nprobe=None, mask=None):
+        """
+        Approximate top-k by dot product
+
+        Args:
+            embeddings: (N, D) matrix the index was built over
+            query: Unit-length query vector
+            k: Number of results
+            nprobe: Partitions to scan (default ANN_NPROBE)
+            mask: Optional boolean row mask - False rows are never returned
+
+        Returns:
+            (rows, scores) best first; fewer than k if the probed
+            partitions hold fewer matching rows
+        """
+        nprobe = min(nprobe or ANN_NPROBE, len(self.lists))
+        centroid_scores = self.centroids @ query
+        probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+
+        # Sorted rows keep the gather from the mmap sequential
+        candidates = np.sort(np.concatenate([self.lists[p] for p in probes]))
+        if mask is not None:
+            candidates = candidates[mask[candidates]]
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = embeddings[candidates] @ query
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(candidates) else np.arange(len(candidates))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return candidates[top], scores[top]
+
+
+def _assign(vectors, centroids, chunk_size=16384):
+    """Nearest centroid for each row, in chunks to bound memory"""
+    labels = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        labels[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return labels
+
+
+# ==================== BENCHMARK ====================
+
+def _synthetic_embeddings(n_rows, dimensions, n_topics, rng):
+    """Clustered unit vectors - closer to real embeddings than uniform noise"""
+    topics = rng.standard_normal((n_topics, dimensions)).astype(np.float32)
+    data = topics[rng.integers(0, n_topics, n_rows)] + 0.6 * rng.standard_normal((n_rows, dimensions)).astype(np.float32)
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def run_benchmark(sizes, nprobes, n_queries=100, k=10, dimensions=384, seed=0):
+    """
+    Compare IVF and quantized recall@k and latency against exact search
+
+    Args:
+        sizes: Store sizes to test (e.g. [10000, 100000, 1000000])
+        nprobes: nprobe values to test
+        n_queries: Queries per configuration
+        k: Results per query
+    """
+    from .vector_store import top_k_similarities
+    from .quantization import QuantizedMatrix
+
+    rng = np.random.default_rng(seed)
+
+    for n_rows in sizes:
+        print(f"\n{'='*60}")
+        print(f"{n_rows:,} items x {dimensions} dims")
+        print(f"{'='*60}")
+
+        embeddings = _synthetic_embeddings(n_rows, dimensions, max(16, n_rows // 500), rng)
+        queries = embeddings[rng.choice(n_rows, n_queries, replace=False)] + 0.3 * rng.standard_normal((n_queries, dimensions)).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+        started = time.perf_counter()
+        exact = [set(top_k_similarities(embeddings, q, k)[0].tolist()) for q in queries]
+        exact_ms = (time.perf_counter() - started) * 1000 / n_queries
+        print(f"exact          {exact_ms:8.2f} ms/query   recall@{k} 1.000")
+
+        for dtype in ('float16', 'int8'):
+            quantized = QuantizedMatrix.from_float(embeddings, dtype)
+            started = time.perf_counter()
+            found = [top_k_similarities(quantized, q, k)[0] for q in queries]
+            quantized_ms = (time.perf_counter() - started) * 1000 / n_queries
+            recall = np.mean([len(exact[i].intersection(found[i].tolist())) / k for i in range(n_queries)])
+            print(f"exact {dtype:<8} {quantized_ms:8.2f} ms/query   recall@{k} {recall:.3f}   (no rescoring)")
+
+        started = time.perf_counter()
+        index = IVFIndex.build(embeddings)
+        print(f"IVF build      {time.perf_counter() - started:8.2f} s         nlist {len(index.lists)}")
+
+        for nprobe in nprobes:
+            started = time.perf_counter()
+            found = [index.search(embeddings, q, k, nprobe=nprobe)[0] for q in queries]
+            ann_ms = (time.perf_counter() - started) * 1000 / n_queries
+
+            recall = np.mean([len(exact[i].intersection(found[i].tolist())) / k for i in range(n_queries)])
+            print(f"IVF nprobe={nprobe:<4} {ann_ms:8.2f} ms/query   recall@{k} {recall:.3f}   ({exact_ms / ann_ms:.1f}x)")
+
+
+def main():
+    """Command-line interface - recall/latency benchmark"""
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'benchmark':
+        print("Usage:")
+        print("  python -m scripts.ann_index benchmark [--sizes 10000,100000,1000000] [--nprobe 4,8,16,32]")
+        sys.exit(1)
+
+    def option(name, default):
+        if name in sys.argv:
+            return [int(value) for value in sys.argv[sys.argv.index(name) + 1].split(',')]
+        return default
+
+    run_benchmark(
+        sizes=option('--sizes', [10000, 100000, 1000000]),
+        nprobes=option('--nprobe', [4, 8, 16, 32])
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+"""
+Shared API Clients for Life OS
+One Anthropic and one OpenAI client per process, so every routing call and
+embedding request reuses the same keep-alive HTTP connection pool instead of
+paying a new TLS handshake
+
+Timeouts and retries are configured here once:
+- API_TIMEOUT / API_CONNECT_TIMEOUT: seconds per request / per connection attempt
+- API_MAX_RETRIES: retries on connection errors, 408/409/429 and 5xx (the SDKs
+  back off exponentially with jitter and honour Retry-After)
+- API_MAX_CONNECTIONS / API_KEEPALIVE_CONNECTIONS / API_KEEPALIVE_EXPIRY: pool size
+
+Wrap calls in `with record_call('anthropic'):` to feed get_client_stats().
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # Installed with both SDKs - only missing if neither is
+
+try:
+    import anthropic
+except ImportError:
+    anthropic = None
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 30))
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 5))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 2))
+API_MAX_CONNECTIONS = int(os.getenv('API_MAX_CONNECTIONS', 20))
+API_KEEPALIVE_CONNECTIONS = int(os.getenv('API_KEEPALIVE_CONNECTIONS', 10))
+API_KEEPALIVE_EXPIRY = float(os.getenv('API_KEEPALIVE_EXPIRY', 60))  # idle seconds before a connection is dropped
+
+# Latencies kept per client for percentiles
+LATENCY_WINDOW = 500
+
+_clients = {}
+_clients_lock = threading.Lock()
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _http_options():
+    """Timeout and keep-alive pool shared by both SDKs' httpx clients"""
+    return {
+        'timeout': httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+        'limits': httpx.Limits(
+            max_connections=API_MAX_CONNECTIONS,
+            max_keepalive_connections=API_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=API_KEEPALIVE_EXPIRY
+        )
+    }
+
+
+def _get_client(name, create):
+    """Process-wide client, created on first use"""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = create()
+                print(f"[API] {name} client ready (timeout {API_TIMEOUT}s, {API_MAX_RETRIES} retries)")
+    return client
+
+
+def get_anthropic_client():
+    """Shared Anthropic client (ANTHROPIC_API_KEY)"""
+    def create():
+        api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise Exception("ANTHROPIC_API_KEY environment variable not set")
+        if anthropic is None:
+            raise Exception("anthropic package not installed")
+        options = _http_options()
+        return anthropic.Anthropic(
+            api_key=api_key,
+            timeout=options['timeout'],
+            max_retries=API_MAX_RETRIES,
+            http_client=anthropic.DefaultHttpxClient(**options)
+        )
+
+    return _get_client('anthropic', create)
+
+
+def get_openai_client():
+    """Shared OpenAI client (OPENAI_API_KEY)"""
+    def create():
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            raise Exception("OPENAI_API_KEY environment variable not set")
+        if openai is None:
+            raise Exception("openai package not installed")
+        options = _http_options()
+        return openai.OpenAI(
+            api_key=api_key,
+            timeout=options['timeout'],
+            max_retries=API_MAX_RETRIES,
+            http_client=openai.DefaultHttpxClient(**options)
+        )
+
+    return _get_client('openai', create)
+
+
+@contextmanager
+def record_call(name):
+    """
+    Time one API call (including SDK retries) for get_client_stats()
+
+    Args:
+        name: Client name ('anthropic', 'openai')
+    """
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        with _stats_lock:
+            stats = _stats.setdefault(name, {
+                'calls': 0, 'errors': 0, 'total_seconds': 0.0, 'max_seconds': 0.0,
+                'recent': deque(maxlen=LATENCY_WINDOW)
+            })
+            stats['calls'] += 1
+            stats['errors'] += failed
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            stats['recent'].append(elapsed)
+
+
+def get_client_stats():
+    """
+    Per-client call counts and latency for this process
+
+    Returns:
+        Dict of client name -> calls, errors, avg/p50/p95/max latency in ms
+    """
+    with _stats_lock:
+        snapshot = {name: dict(stats, recent=sorted(stats['recent'])) for name, stats in _stats.items()}
+
+    result = {}
+    for name, stats in snapshot.items():
+        recent = stats['recent']
+        result[name] = {
+            'calls': stats['calls'],
+            'errors': stats['errors'],
+            'avg_ms': round(stats['total_seconds'] * 1000 / stats['calls'], 1),
+            'p50_ms': round(recent[len(recent) // 2] * 1000, 1),
+            'p95_ms': round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1),
+            'max_ms': round(stats['max_seconds'] * 1000, 1),
+            'connected': name in _clients
+        }
+    return result
@@ -12,9 +12,16 @@ from pathlib import Path
 # Add parent directory to path to import our modules
 sys.path.append(str(Path(__file__).parent))
 
-from .db_helper import execute_query, execute_insert, get_db_type
-from .vector_store import add_to_vector_store, search_memory
+from .db_helper import execute_query, execute_insert, execute_many, get_db_type, get_pool_stats, check_db_health, transaction
+from .vector_store import add_to_vector_store, remove_from_vector_store, search_memory
+from .embeddings import get_query_cache_stats
+from .api_clients import get_client_stats
 from .rag_query import execute_rag_query
+from .router import invalidate_category_cache
+from .category_counters import (
+    get_category_counts, task_counter_state, note_counter_state, record_task_change,
+    record_note_change, move_task_counters, drop_category_counters
+)
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend development
@@ -90,40 +97,7 @@ def get_categories_tree():
 def get_category_task_counts():
     """Get active task counts for each category (including immediate children)"""
     try:
-        # Get all categories
-        categories = execute_query(
-            "SELECT id FROM categories",
-            fetch='all'
-        )
-
-        # Build counts dictionary
-        counts = {}
-
-        for cat in categories:
-            cat_id = cat['id']
-
-            # Get immediate child IDs
-            child_ids = get_immediate_child_ids(cat_id)
-            all_ids = [cat_id] + child_ids
-
-            # Count active tasks (not completed) in this category and immediate children
-            # Use %s for PostgreSQL compatibility (db_helper will handle conversion if SQLite)
-            db_type = get_db_type()
-            placeholder = '%s' if db_type == 'postgres' else '?'
-            placeholders = ','.join([placeholder] * len(all_ids))
-            # PostgreSQL uses FALSE for boolean, SQLite uses 0
-            completed_value = 'FALSE' if db_type == 'postgres' else '0'
-            result = execute_query(
-                f"SELECT COUNT(*) as count FROM tasks WHERE category_id IN ({placeholders}) AND completed = {completed_value}",
-                tuple(all_ids),
-                fetch='one'
-            )
-
-            count = result['count'] if result else 0
-            if count > 0:
-                counts[cat_id] = count
-
-        return jsonify(counts), 200
+        return jsonify(get_category_counts()['tasks']), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -131,38 +105,15 @@ def get_category_task_counts():
 def get_category_note_counts():
     """Get note counts for each category (including immediate children)"""
     try:
-        # Get all categories
-        categories = execute_query(
-            "SELECT id FROM categories",
-            fetch='all'
-        )
-
-        # Build counts dictionary
-        counts = {}
-
-        for cat in categories:
-            cat_id = cat['id']
-
-            # Get immediate child IDs
-            child_ids = get_immediate_child_ids(cat_id)
-            all_ids = [cat_id] + child_ids
-
-            # Count notes in this category and immediate children
-            # Use %s for PostgreSQL compatibility (db_helper will handle conversion if SQLite)
-            db_type = get_db_type()
-            placeholder = '%s' if db_type == 'postgres' else '?'
-            placeholders = ','.join([placeholder] * len(all_ids))
-            result = execute_query(
-                f"SELECT COUNT(*) as count FROM notes WHERE category_id IN ({placeholders})",
-                tuple(all_ids),
-                fetch='one'
-            )
-
-            count = result['count'] if result else 0
-            if count > 0:
-                counts[cat_id] = count
+        return jsonify(get_category_counts()['notes']), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        return jsonify(counts), 200
+@app.route('/api/categories/counts', methods=['GET'])
+def get_category_counts_combined():
+    """Task, completed task and note counts for the sidebar in one request"""
+    try:
+        return jsonify(get_category_counts()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -184,6 +135,7 @@ def create_category():
             "INSERT INTO categories (name, description, parent_id, sort_order) VALUES (?, ?, ?, ?)",
             (name, description, parent_id, sort_order)
         )
+        invalidate_category_cache()
 
         # Return created category
         category = execute_query(
@@ -229,6 +181,7 @@ def update_category(category_id):
         query = f"UPDATE categories SET {', '.join(updates)} WHERE id = ?"
 
         execute_query(query, tuple(params))
+        invalidate_category_cache()
 
         # Return updated category
         category = execute_query(
@@ -244,52 +197,68 @@ def update_category(category_id):
 def delete_category(category_id):
     """Delete a category"""
     try:
-        # Check if category has children
-        children = execute_query(
-            "SELECT COUNT(*) as count FROM categories WHERE parent_id = ?",
-            (category_id,),
-            fetch='one'
-        )
-
-        if children['count'] > 0:
-            return jsonify({
-                'error': 'Cannot delete category with subcategories',
-                'has_children': True,
-                'child_count': children['count']
-            }), 400
-
-        # Check if category has tasks
-        tasks = execute_query(
-            "SELECT COUNT(*) as count FROM tasks WHERE category_id = ?",
-            (category_id,),
-            fetch='one'
-        )
+        deleted = []
+
+        # Checks, task cleanup and the delete share one connection and commit
+        with transaction():
+            # Check if category has children
+            children = execute_query(
+                "SELECT COUNT(*) as count FROM categories WHERE parent_id = ?",
+                (category_id,),
+                fetch='one'
+            )
 
-        if tasks['count'] > 0:
-            # Get reassignment target from request (optional)
-            data = request.json or {}
-            reassign_to = data.get('reassign_to')
-            delete_tasks = data.get('delete_tasks', False)
-
-            if delete_tasks:
-                # Delete all tasks in this category
-                execute_query("DELETE FROM tasks WHERE category_id = ?", (category_id,))
-            elif reassign_to:
-                # Reassign tasks to another category
-                execute_query(
-                    "UPDATE tasks SET category_id = ? WHERE category_id = ?",
-                    (reassign_to, category_id)
-                )
-            else:
-                # Return error with task count - user needs to decide
+            if children['count'] > 0:
                 return jsonify({
-                    'error': 'Category has tasks that need to be reassigned or deleted',
-                    'has_tasks': True,
-                    'task_count': tasks['count']
+                    'error': 'Cannot delete category with subcategories',
+                    'has_children': True,
+                    'child_count': children['count']
                 }), 400
 
-        # Delete the category
-        execute_query("DELETE FROM categories WHERE id = ?", (category_id,))
+            # Check if category has tasks
+            tasks = execute_query(
+                "SELECT COUNT(*) as count FROM tasks WHERE category_id = ?",
+                (category_id,),
+                fetch='one'
+            )
+
+            if tasks['count'] > 0:
+                # Get reassignment target from request (optional)
+                data = request.json or {}
+                reassign_to = data.get('reassign_to')
+                delete_tasks = data.get('delete_tasks', False)
+
+                if delete_tasks:
+                    # Delete all tasks in this category
+                    deleted = execute_query(
+                        "SELECT id FROM tasks WHERE category_id = ?",
+                        (category_id,),
+                        fetch='all'
+                    )
+                    execute_query("DELETE FROM tasks WHERE category_id = ?", (category_id,))
+                elif reassign_to:
+                    # Reassign tasks to another category
+                    execute_query(
+                        "UPDATE tasks SET category_id = ? WHERE category_id = ?",
+                        (reassign_to, category_id)
+                    )
+                    move_task_counters(category_id, reassign_to)
+                else:
+                    # Return error with task count - user needs to decide
+                    return jsonify({
+                        'error': 'Category has tasks that need to be reassigned or deleted',
+                        'has_tasks': True,
+                        'task_count': tasks['count']
+                    }), 400
+
+            # Delete the category
+            execute_query("DELETE FROM categories WHERE id = ?", (category_id,))
+            drop_category_counters(category_id)
+        invalidate_category_cache()
+
+        # Vector store only after the commit
+        for task in deleted:
+            remove_from_vector_store(task['id'], 'task')
 
         return jsonify({'message': 'Category deleted successfully'}), 200
     except Exception as e:
@@ -373,51 +342,45 @@ def create_task():
         if not data.get('content'):
             return jsonify({'error': 'Content is required'}), 400
 
-        # Insert task
-        task_id = execute_insert(
-            """
-            INSERT INTO tasks (category_id, content, due_date, completed)
-            VALUES (?, ?, ?, ?)
-            """,
-            (
-                data.get('category_id'),
-                data['content'],
-                data.get('due_date'),
-                data.get('completed', False)
-            ),
-            return_id=True
-        )
-
-        # Get category name for vectorization
-        category_row = execute_query(
-            "SELECT name FROM categories WHERE id = ?",
-            (data.get('category_id'),),
-            fetch='one'
-        ) if data.get('category_id') else None
+        # Insert and read back in one transaction
+        with transaction():
+            task_id = execute_insert(
+                """
+                INSERT INTO tasks (category_id, content, due_date, completed)
+                VALUES (?, ?, ?, ?)
+                """,
+                (
+                    data.get('category_id'),
+                    data['content'],
+                    data.get('due_date'),
+                    data.get('completed', False)
+                ),
+                return_id=True
+            )
 
-        category_name = category_row['name'] if category_row else 'Uncategorized'
+            row = execute_query(
+                """
+                SELECT t.*, c.name as category_name
+                FROM tasks t
+                LEFT JOIN categories c ON t.category_id = c.id
+                WHERE t.id = ?
+                """,
+                (task_id,),
+                fetch='one'
+            )
+            record_task_change(None, (row['category_id'], row['completed']))
+        task = row_to_dict(row)
 
-        # Add to vector store
+        # Add to vector store (after the commit - embedding is a network call)
         add_to_vector_store(
             item_id=task_id,
             item_type='task',
-            category=category_name,
+            category=task['category_name'] or 'Uncategorized',
             content=data['content'],
             due_date=data.get('due_date')
         )
 
         # Return created task
-        row = execute_query(
-            """
-            SELECT t.*, c.name as category_name
-            FROM tasks t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.id = ?
-            """,
-            (task_id,),
-            fetch='one'
-        )
-        task = row_to_dict(row)
         return jsonify(task), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -453,14 +416,14 @@ def update_task(task_id):
 
         params.append(task_id)
 
-        execute_query(
-            f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?",
-            tuple(params)
-        )
+        # Update, read back and adjust category counters in one transaction
+        with transaction():
+            before = task_counter_state(task_id)
+            execute_query(
+                f"UPDATE tasks SET {', '.join(updates)} WHERE id = ?",
+                tuple(params)
+            )
 
-        # Update vector store if content or category changed
-        if 'content' in data or 'category_id' in data:
-            # Get full task data for vectorization
             row = execute_query(
                 """
                 SELECT t.*, c.name as category_name
@@ -471,29 +434,24 @@ def update_task(task_id):
                 (task_id,),
                 fetch='one'
             )
-            task = row_to_dict(row)
+            if before:
+                record_task_change(before, (row['category_id'], row['completed']))
+        task = row_to_dict(row)
 
-            if task:
-                add_to_vector_store(
-                    item_id=task_id,
-                    item_type='task',
-                    category=task['category_name'] or 'Uncategorized',
-                    content=task['content'],
-                    due_date=task.get('due_date')
-                )
+        # Update vector store entry (upsert replaces the existing item)
+        # Embedding is only re-requested if the embedded text changed (embedding cache)
+        if task and any(field in data for field in ('content', 'category_id', 'due_date', 'completed')):
+            add_to_vector_store(
+                item_id=task_id,
+                item_type='task',
+                category=task['category_name'] or 'Uncategorized',
+                content=task['content'],
+                due_date=task.get('due_date'),
+                completed=task['completed'],
+                created_date=task.get('created_date')
+            )
 
         # Return updated task
-        row = execute_query(
-            """
-            SELECT t.*, c.name as category_name
-            FROM tasks t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.id = ?
-            """,
-            (task_id,),
-            fetch='one'
-        )
-        task = row_to_dict(row)
         return jsonify(task), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -502,36 +460,49 @@ def update_task(task_id):
 def toggle_task_completion(task_id):
     """Toggle task completion status"""
     try:
-        # Get current status
-        row = execute_query(
-            "SELECT completed FROM tasks WHERE id = ?",
-            (task_id,),
-            fetch='one'
-        )
+        with transaction():
+            # Get current status (row locked until the toggle commits)
+            before = task_counter_state(task_id)
 
-        if not row:
-            return jsonify({'error': 'Task not found'}), 404
+            if not before:
+                return jsonify({'error': 'Task not found'}), 404
 
-        # Toggle status
-        new_status = not row['completed']
+            # Toggle status
+            new_status = not before[1]
 
-        execute_query(
-            "UPDATE tasks SET completed = ? WHERE id = ?",
-            (new_status, task_id)
-        )
+            execute_query(
+                "UPDATE tasks SET completed = ? WHERE id = ?",
+                (new_status, task_id)
+            )
+            record_task_change(before, (before[0], new_status))
 
-        # Return updated task
-        row = execute_query(
-            """
-            SELECT t.*, c.name as category_name
-            FROM tasks t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.id = ?
-            """,
-            (task_id,),
-            fetch='one'
-        )
+            # Return updated task
+            row = execute_query(
+                """
+                SELECT t.*, c.name as category_name
+                FROM tasks t
+                LEFT JOIN categories c ON t.category_id = c.id
+                WHERE t.id = ?
+                """,
+                (task_id,),
+                fetch='one'
+            )
         task = row_to_dict(row)
+
+        # Keep the completed filter in search accurate (embedding comes from cache)
+        try:
+            add_to_vector_store(
+                item_id=task_id,
+                item_type='task',
+                category=task['category_name'] or 'Uncategorized',
+                content=task['content'],
+                due_date=task.get('due_date'),
+                completed=task['completed'],
+                created_date=task.get('created_date')
+            )
+        except Exception as e:
+            print(f"[Warning] Failed to update task {task_id} in vector store: {e}")
+
         return jsonify(task), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -540,24 +511,22 @@ def toggle_task_completion(task_id):
 def delete_task(task_id):
     """Delete a task"""
     try:
-        # Check if task exists
-        row = execute_query(
-            "SELECT id FROM tasks WHERE id = ?",
-            (task_id,),
-            fetch='one'
-        )
+        with transaction():
+            # Check if task exists
+            before = task_counter_state(task_id)
 
-        if not row:
-            return jsonify({'error': 'Task not found'}), 404
+            if not before:
+                return jsonify({'error': 'Task not found'}), 404
 
-        # Delete from database
-        execute_query(
-            "DELETE FROM tasks WHERE id = ?",
-            (task_id,)
-        )
+            # Delete from database
+            execute_query(
+                "DELETE FROM tasks WHERE id = ?",
+                (task_id,)
+            )
+            record_task_change(before, None)
 
-        # Note: We don't remove from vector store as it's rebuilt periodically
-        # Future enhancement: Add remove_from_vector_store function
+        # Tombstone in vector store so it stops showing up in search
+        remove_from_vector_store(task_id, 'task')
 
         return jsonify({'message': 'Task deleted successfully'}), 200
     except Exception as e:
@@ -622,15 +591,17 @@ def create_note():
         if not data.get('content'):
             return jsonify({'error': 'Content is required'}), 400
 
-        # Insert note
-        note_id = execute_insert(
-            """
-            INSERT INTO notes (category_id, content)
-            VALUES (?, ?)
-            """,
-            (data.get('category_id'), data['content']),
-            return_id=True
-        )
+        # Insert note and count it in one transaction
+        with transaction():
+            note_id = execute_insert(
+                """
+                INSERT INTO notes (category_id, content)
+                VALUES (?, ?)
+                """,
+                (data.get('category_id'), data['content']),
+                return_id=True
+            )
+            record_note_change(None, (data.get('category_id'),))
 
         # Get category name for vectorization
         category_row = execute_query(
@@ -687,10 +658,14 @@ def update_note(note_id):
 
         params.append(note_id)
 
-        execute_query(
-            f"UPDATE notes SET {', '.join(updates)} WHERE id = ?",
-            tuple(params)
-        )
+        with transaction():
+            before = note_counter_state(note_id)
+            execute_query(
+                f"UPDATE notes SET {', '.join(updates)} WHERE id = ?",
+                tuple(params)
+            )
+            if before:
+                record_note_change(before, (data['category_id'],) if 'category_id' in data else before)
 
         # Update vector store if content or category changed
         if 'content' in data or 'category_id' in data:
@@ -711,7 +686,8 @@ def update_note(note_id):
                     item_id=note_id,
                     item_type='note',
                     category=note['category_name'] or 'Uncategorized',
-                    content=note['content']
+                    content=note['content'],
+                    created_date=note.get('created_date')
                 )
 
         # Return updated note
@@ -734,19 +710,20 @@ def update_note(note_id):
 def delete_note(note_id):
     """Delete a note"""
     try:
-        row = execute_query(
-            "SELECT id FROM notes WHERE id = ?",
-            (note_id,),
-            fetch='one'
-        )
+        with transaction():
+            before = note_counter_state(note_id)
 
-        if not row:
-            return jsonify({'error': 'Note not found'}), 404
+            if not before:
+                return jsonify({'error': 'Note not found'}), 404
 
-        execute_query(
-            "DELETE FROM notes WHERE id = ?",
-            (note_id,)
-        )
+            execute_query(
+                "DELETE FROM notes WHERE id = ?",
+                (note_id,)
+            )
+            record_note_change(before, None)
+
+        # Tombstone in vector store so it stops showing up in search
+        remove_from_vector_store(note_id, 'note')
 
         return jsonify({'message': 'Note deleted successfully'}), 200
     except Exception as e:
@@ -999,6 +976,65 @@ def health_inbody():
             return jsonify({'error': str(e)}), 500
 
 
+# Batch endpoint specs: table, columns in insert order, required fields,
+# and defaults for optional fields (callables evaluated per request)
+HEALTH_LOG_BATCH = {
+    'sleep': ('sleep_logs', ('date', 'hours', 'notes'), ('hours',), {}),
+    'water': ('water_logs', ('date', 'cups', 'timestamp'), (), {'cups': 1, 'timestamp': lambda: datetime.now().isoformat()}),
+    'exercise': ('exercise_logs', ('date', 'activity_type', 'duration_minutes', 'notes'), ('activity_type', 'duration_minutes'), {}),
+    'sauna': ('sauna_logs', ('date', 'num_visits', 'duration_minutes'), ('duration_minutes',), {'num_visits': 1}),
+    'inbody': ('inbody_measurements', ('date', 'weight', 'smm', 'pbf', 'ecw_tbw_ratio', 'notes'), ('weight', 'smm', 'pbf', 'ecw_tbw_ratio'), {})
+}
+
+@app.route('/api/health/<log_type>/batch', methods=['POST'])
+def health_batch(log_type):
+    """
+    Log many health entries in one request (backfills, wearable imports)
+
+    Body: JSON array of entries (same fields as the single POST routes),
+    or {"logs": [...]}. All entries are inserted in one transaction -
+    if any row fails, none are kept.
+    """
+    if log_type not in HEALTH_LOG_BATCH:
+        return jsonify({'error': f'Unknown log type: {log_type}'}), 404
+
+    try:
+        data = request.get_json()
+        entries = data.get('logs') if isinstance(data, dict) else data
+        if not isinstance(entries, list) or not entries:
+            return jsonify({'error': 'Expected a non-empty array of logs'}), 400
+
+        table, columns, required, defaults = HEALTH_LOG_BATCH[log_type]
+        today = datetime.now().date().isoformat()
+
+        rows = []
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                return jsonify({'error': f"Entry {index}: expected an object"}), 400
+            # 0 is a valid value (e.g. 0 hours of sleep) - only absent fields are missing
+            missing = [field for field in required if entry.get(field) is None]
+            if missing:
+                return jsonify({'error': f"Entry {index}: {', '.join(missing)} required"}), 400
+
+            row = []
+            for column in columns:
+                value = entry.get(column)
+                if value is None:
+                    default = today if column == 'date' else defaults.get(column)
+                    value = default() if callable(default) else default
+                row.append(value)
+            rows.append(tuple(row))
+
+        inserted = execute_many(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+            rows
+        )
+
+        return jsonify({'log_type': log_type, 'inserted': inserted}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/health/summary', methods=['GET'])
 def health_summary():
     """Get today's health summary"""
@@ -1059,10 +1095,24 @@ def health_summary():
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint (includes a pooled database round trip)"""
+    db_ok, db_latency_ms, db_error = check_db_health()
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if db_ok else 'degraded',
         'database': get_db_type(),
+        'database_ok': db_ok,
+        'database_latency_ms': db_latency_ms,
+        'database_error': db_error,
+        'timestamp': datetime.now().isoformat()
+    }), 200
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Per-process performance counters (caches, connection pool, API clients)"""
+    return jsonify({
+        'query_cache': get_query_cache_stats(),
+        'db_pool': get_pool_stats(),
+        'api_clients': get_client_stats(),
         'timestamp': datetime.now().isoformat()
     }), 200
 
@@ -1075,7 +1125,9 @@ if __name__ == '__main__':
     print("Server running on http://localhost:5000")
     print("\nAvailable endpoints:")
     print("  GET    /api/health")
+    print("  GET    /api/metrics")
     print("  GET    /api/categories")
+    print("  GET    /api/categories/counts")
     print("  GET    /api/tasks")
     print("  GET    /api/tasks/<id>")
     print("  POST   /api/tasks")
@@ -1093,6 +1145,7 @@ if __name__ == '__main__':
     print("  GET/POST /api/health/exercise")
     print("  GET/POST /api/health/sauna")
     print("  GET/POST /api/health/inbody")
+    print("  POST   /api/health/<type>/batch")
     print("  GET    /api/health/summary")
 
     app.run(debug=True, host='0.0.0.0', port=5000)
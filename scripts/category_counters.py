@@ -0,0 +1,291 @@
+"""
+Materialized Category Counters for Life OS
+Per-category active task, completed task and note counts, adjusted in the
+same transaction as every task/note write so count reads never scan tasks/notes
+
+Writers (api_server.py, router.py):
+    with transaction():
+        before = task_counter_state(task_id)      # locks the row on PostgreSQL
+        ... UPDATE tasks ...
+        record_task_change(before, (category_id, completed))
+
+Counters drift only if tasks/notes are written outside these paths
+(manual SQL, migrations) - `python -m scripts.category_counters reconcile`
+rebuilds them from the base tables.
+"""
+
+from .db_helper import execute_query, execute_many, get_db_type, after_commit, transaction
+
+COUNTERS_TABLE = 'category_counters'
+
+COUNTER_COLUMNS = ('active_tasks', 'completed_tasks', 'notes')
+
+CREATE_COUNTERS_TABLE = f'''
+    CREATE TABLE IF NOT EXISTS {COUNTERS_TABLE} (
+        category_id INTEGER PRIMARY KEY,
+        active_tasks INTEGER NOT NULL DEFAULT 0,
+        completed_tasks INTEGER NOT NULL DEFAULT 0,
+        notes INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+_table_ready = False
+
+
+def ensure_counters_table():
+    """
+    Create the counters table once per process, seeding it from the base
+    tables if it starts out empty while tasks/notes exist
+
+    Inside a transaction the DDL joins it, so the table is marked ready
+    once that transaction commits (a rollback would undo the CREATE).
+
+    Returns:
+        True if the table was just seeded - it already reflects the
+        caller's uncommitted writes, so their deltas must be skipped
+    """
+    if _table_ready:
+        return False
+
+    execute_query(CREATE_COUNTERS_TABLE)
+
+    has_items = None
+    seeded = execute_query(f'SELECT 1 AS found FROM {COUNTERS_TABLE} LIMIT 1', fetch='one')
+    if not seeded:
+        has_items = execute_query(
+            'SELECT 1 AS found FROM tasks UNION ALL SELECT 1 AS found FROM notes LIMIT 1',
+            fetch='one'
+        )
+        if has_items:
+            print(f"[DB] Seeding {COUNTERS_TABLE} from tasks/notes")
+            reconcile_counters(verbose=False)
+
+    after_commit(_mark_table_ready)
+    return bool(not seeded and has_items)
+
+
+def _mark_table_ready():
+    """Skip the CREATE/probe from now on (the table is committed)"""
+    global _table_ready
+    _table_ready = True
+
+
+def _adjust(deltas):
+    """
+    Add deltas to counter rows (created on first use)
+
+    Args:
+        deltas: Dict of category_id -> [active_tasks, completed_tasks, notes]
+    """
+    rows = [
+        (category_id, *values)
+        for category_id, values in deltas.items()
+        if category_id is not None and any(values)
+    ]
+    if not rows or ensure_counters_table():
+        return
+
+    execute_many(f'''
+        INSERT INTO {COUNTERS_TABLE} (category_id, active_tasks, completed_tasks, notes)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (category_id) DO UPDATE SET
+            active_tasks = {COUNTERS_TABLE}.active_tasks + excluded.active_tasks,
+            completed_tasks = {COUNTERS_TABLE}.completed_tasks + excluded.completed_tasks,
+            notes = {COUNTERS_TABLE}.notes + excluded.notes
+    ''', rows)
+
+
+def _row_lock():
+    """Row lock for read-then-write on PostgreSQL (SQLite serializes writers already)"""
+    return ' FOR UPDATE' if get_db_type() == 'postgres' else ''
+
+
+def task_counter_state(task_id):
+    """
+    (category_id, completed) of a task before it is changed, None if it doesn't exist
+    completed is None for a NULL column (counted as neither active nor completed).
+    Call inside the write's transaction.
+    """
+    row = execute_query(
+        f'SELECT category_id, completed FROM tasks WHERE id = ?{_row_lock()}',
+        (task_id,),
+        fetch='one'
+    )
+    if not row:
+        return None
+    return (row['category_id'], None if row['completed'] is None else bool(row['completed']))
+
+
+def note_counter_state(note_id):
+    """
+    (category_id,) of a note before it is changed, None if it doesn't exist
+    Call inside the write's transaction.
+    """
+    row = execute_query(
+        f'SELECT category_id FROM notes WHERE id = ?{_row_lock()}',
+        (note_id,),
+        fetch='one'
+    )
+    return (row['category_id'],) if row else None
+
+
+def record_task_change(before, after):
+    """
+    Adjust counters for a task insert, update or delete
+
+    Args:
+        before: (category_id, completed) before the write, None for an insert
+        after: (category_id, completed) after the write, None for a delete
+    """
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is None:
+            continue
+        category_id, completed = state
+        if completed is None:
+            continue  # NULL completed is in neither counter (matches _computed_counters)
+        values = deltas.setdefault(category_id, [0, 0, 0])
+        values[1 if completed else 0] += sign
+    _adjust(deltas)
+
+
+def record_note_change(before, after):
+    """
+    Adjust counters for a note insert, update or delete
+
+    Args:
+        before: (category_id,) before the write, None for an insert
+        after: (category_id,) after the write, None for a delete
+    """
+    deltas = {}
+    for state, sign in ((before, -1), (after, 1)):
+        if state is not None:
+            deltas.setdefault(state[0], [0, 0, 0])[2] += sign
+    _adjust(deltas)
+
+
+def move_task_counters(from_category_id, to_category_id):
+    """Move task counts after `UPDATE tasks SET category_id = to WHERE category_id = from`"""
+    if ensure_counters_table():
+        return
+    row = execute_query(
+        f'SELECT active_tasks, completed_tasks FROM {COUNTERS_TABLE} WHERE category_id = ?',
+        (from_category_id,),
+        fetch='one'
+    )
+    if not row:
+        return
+    _adjust({
+        from_category_id: [-row['active_tasks'], -row['completed_tasks'], 0],
+        to_category_id: [row['active_tasks'], row['completed_tasks'], 0]
+    })
+
+
+def drop_category_counters(category_id):
+    """Forget a deleted category's counters"""
+    ensure_counters_table()
+    execute_query(f'DELETE FROM {COUNTERS_TABLE} WHERE category_id = ?', (category_id,))
+
+
+def get_category_counts():
+    """
+    Task and note counts per category, each including its immediate
+    children - reads the counters (one row per category), not tasks/notes
+
+    Returns:
+        {'tasks': {category_id: active}, 'completed': {category_id: completed},
+         'notes': {category_id: notes}} (non-zero only)
+    """
+    ensure_counters_table()
+    rows = execute_query(f'''
+        SELECT c.id AS category_id,
+               SUM(k.active_tasks) AS tasks,
+               SUM(k.completed_tasks) AS completed,
+               SUM(k.notes) AS notes
+        FROM categories c
+        JOIN categories m ON m.id = c.id OR m.parent_id = c.id
+        JOIN {COUNTERS_TABLE} k ON k.category_id = m.id
+        GROUP BY c.id
+    ''', fetch='all')
+
+    counts = {'tasks': {}, 'completed': {}, 'notes': {}}
+    for row in rows:
+        for key in counts:
+            # int() - PostgreSQL returns SUM() as Decimal
+            if row[key]:
+                counts[key][row['category_id']] = int(row[key])
+    return counts
+
+
+def _computed_counters():
+    """Counters recomputed from tasks/notes: {category_id: (active, completed, notes)}"""
+    rows = execute_query('''
+        WITH direct AS (
+            SELECT category_id,
+                   SUM(CASE WHEN completed = ? THEN 1 ELSE 0 END) AS active_tasks,
+                   SUM(CASE WHEN completed = ? THEN 1 ELSE 0 END) AS completed_tasks,
+                   0 AS notes
+            FROM tasks GROUP BY category_id
+            UNION ALL
+            SELECT category_id, 0 AS active_tasks, 0 AS completed_tasks, COUNT(*) AS notes
+            FROM notes GROUP BY category_id
+        )
+        SELECT d.category_id,
+               SUM(d.active_tasks) AS active_tasks,
+               SUM(d.completed_tasks) AS completed_tasks,
+               SUM(d.notes) AS notes
+        FROM direct d
+        JOIN categories c ON c.id = d.category_id
+        GROUP BY d.category_id
+    ''', (False, True), fetch='all')
+    return {
+        row['category_id']: tuple(int(row[column]) for column in COUNTER_COLUMNS)
+        for row in rows
+    }
+
+
+def reconcile_counters(verbose=True):
+    """
+    Rebuild every counter from tasks/notes in one transaction
+
+    Returns:
+        Number of categories whose counters were wrong
+    """
+    with transaction():
+        execute_query(CREATE_COUNTERS_TABLE)
+        current = {
+            row['category_id']: tuple(row[column] for column in COUNTER_COLUMNS)
+            for row in execute_query(f'SELECT * FROM {COUNTERS_TABLE}', fetch='all')
+        }
+        computed = _computed_counters()
+
+        execute_query(f'DELETE FROM {COUNTERS_TABLE}')
+        execute_many(
+            f'INSERT INTO {COUNTERS_TABLE} (category_id, active_tasks, completed_tasks, notes) VALUES (?, ?, ?, ?)',
+            [(category_id, *values) for category_id, values in computed.items()]
+        )
+
+    empty = (0, 0, 0)
+    drifted = sum(
+        1 for category_id in set(current) | set(computed)
+        if current.get(category_id, empty) != computed.get(category_id, empty)
+    )
+    if verbose:
+        print(f"[OK] Reconciled {len(computed)} categories ({drifted} corrected)")
+    return drifted
+
+
+def main():
+    """Command-line interface for category counters"""
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'reconcile':
+        print("Usage:")
+        print("  python -m scripts.category_counters reconcile   - Rebuild counters from tasks/notes")
+        sys.exit(1)
+
+    reconcile_counters()
+
+
+if __name__ == '__main__':
+    main()
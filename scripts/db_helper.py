@@ -1,10 +1,22 @@
 """
 Database Helper - Auto-detects PostgreSQL vs SQLite
 Uses DATABASE_URL env var to determine which database to use
+
+Connections are pooled: a psycopg_pool ConnectionPool per process on
+PostgreSQL, one persistent connection per thread on SQLite. Callers still
+just close() what get_db_connection() returns - that hands it back.
+
+Inside `with transaction():` execute_query/execute_insert share one
+connection and commit once at the end (rolled back on error).
 """
 
 import os
+import re
+import time
 import sqlite3
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -30,23 +42,305 @@ else:
     except ImportError:
         PSYCOPG_AVAILABLE = False
 
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None  # Falls back to one connection per query
+
+# Pool configuration (set DB_POOL=off to open a connection per query)
+DB_POOL_ENABLED = os.getenv('DB_POOL', 'on').lower() != 'off'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))        # seconds to wait for a free connection
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))     # close idle connections above min_size after this
+DB_POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 1800))  # recycle connections after this
+
+# Server-side prepared statements on PostgreSQL (set DB_PREPARE=off behind PgBouncer
+# in transaction mode, which can't keep per-connection prepared statements)
+DB_PREPARE_ENABLED = os.getenv('DB_PREPARE', 'on').lower() != 'off'
+
+# Distinct SQL strings whose translated form is cached
+STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', 512))
+
+# Bulk inserts of at least this many rows use COPY on PostgreSQL
+DB_COPY_MIN_ROWS = int(os.getenv('DB_COPY_MIN_ROWS', 100))
+
+_pg_pool = None
+_pg_pool_lock = threading.Lock()
+_sqlite_local = threading.local()
+_transaction_local = threading.local()
+_pool_stats = {'checkouts': 0, 'connections_opened': 0, 'wait_seconds': 0.0}
+_pool_stats_lock = threading.Lock()
+
+
+def _count(key, amount=1):
+    with _pool_stats_lock:
+        _pool_stats[key] += amount
+
+
+class PooledConnection:
+    """
+    Connection handed out by get_db_connection()
+
+    Behaves like the underlying connection, except close() rolls back any
+    uncommitted work and returns it to the pool (PostgreSQL) or keeps it
+    open for the next query on this thread (SQLite).
+    """
+
+    def __init__(self, conn, release):
+        self._conn = conn
+        self._release = release
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        self._cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        if self._conn is None:
+            return
+        for cursor in self._cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        conn, self._conn, self._cursors = self._conn, None, []
+        self._release(conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def _get_pg_pool():
+    """Process-wide PostgreSQL pool, opened on first use (after gunicorn forks)"""
+    global _pg_pool
+    if _pg_pool is None:
+        with _pg_pool_lock:
+            if _pg_pool is None:
+                _pg_pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_idle=DB_POOL_MAX_IDLE,
+                    max_lifetime=DB_POOL_MAX_LIFETIME,
+                    check=ConnectionPool.check_connection,  # health check on checkout
+                    name='life-os',
+                    open=True
+                )
+                print(f"[DB] Connection pool opened (min {DB_POOL_MIN_SIZE}, max {DB_POOL_MAX_SIZE})")
+    return _pg_pool
+
+
+def _release_pg(conn):
+    """
+    Return a connection to the pool - putconn() rolls back anything left
+    uncommitted and discards broken connections, so the slot is never lost
+    """
+    _get_pg_pool().putconn(conn)
+
+
+def _get_sqlite_connection():
+    """Persistent connection for the calling thread (reopened if DB_PATH changes)"""
+    conn = getattr(_sqlite_local, 'conn', None)
+    if conn is None or _sqlite_local.path != DB_PATH:
+        if conn is not None:
+            conn.close()
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        _sqlite_local.conn = conn
+        _sqlite_local.path = DB_PATH
+        _count('connections_opened')
+    return conn
+
+
+def _release_sqlite(conn):
+    """Keep the thread's connection open, but never leak an open transaction"""
+    if conn.in_transaction:
+        conn.rollback()
+
 def get_db_connection():
     """
     Get database connection - auto-detects PostgreSQL vs SQLite
+    Close the connection when done - pooled connections are returned, not closed.
+
     Returns: (connection, cursor, db_type)
     """
+    _count('checkouts')
+
     if DATABASE_URL and PSYCOPG_AVAILABLE:
         # Production: Use PostgreSQL with psycopg3
-        conn = psycopg.connect(DATABASE_URL)
+        if DB_POOL_ENABLED and ConnectionPool is not None:
+            started = time.perf_counter()
+            conn = PooledConnection(_get_pg_pool().getconn(), _release_pg)
+            _count('wait_seconds', time.perf_counter() - started)
+        else:
+            conn = psycopg.connect(DATABASE_URL)
+            _count('connections_opened')
         cursor = conn.cursor(row_factory=dict_row)
         return conn, cursor, 'postgres'
     else:
         # Local development: Use SQLite
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+        if DB_POOL_ENABLED:
+            conn = PooledConnection(_get_sqlite_connection(), _release_sqlite)
+        else:
+            conn = sqlite3.connect(DB_PATH)
+            conn.row_factory = sqlite3.Row  # Return rows as dictionaries
+            _count('connections_opened')
         cursor = conn.cursor()
         return conn, cursor, 'sqlite'
 
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: every execute_query/execute_insert on this thread inside
+    the block runs on one connection and is committed once on exit, or
+    rolled back if the block raises. Nested blocks join the outer one.
+
+    Keep slow non-database work (embedding API calls, vector store
+    updates) outside the block - on SQLite an open write transaction
+    blocks other writers.
+
+    Yields:
+        (connection, cursor, db_type) for statements the helpers don't cover
+    """
+    current = getattr(_transaction_local, 'current', None)
+    if current is not None:
+        yield current
+        return
+
+    conn, cursor, db_type = get_db_connection()
+    _transaction_local.current = (conn, cursor, db_type)
+    _transaction_local.after_commit = []
+    try:
+        yield conn, cursor, db_type
+        conn.commit()
+        callbacks = _transaction_local.after_commit
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _transaction_local.current = None
+        _transaction_local.after_commit = []
+        conn.close()
+
+    for callback in callbacks:
+        callback()
+
+
+def after_commit(callback):
+    """
+    Run callback once the enclosing transaction() commits (dropped if it
+    rolls back), or right away outside a transaction
+
+    For process-level state that must only reflect committed work, e.g.
+    marking a table as created.
+    """
+    if getattr(_transaction_local, 'current', None) is None:
+        callback()
+    else:
+        _transaction_local.after_commit.append(callback)
+
+
+def in_transaction():
+    """True inside a `with transaction():` block on this thread"""
+    return getattr(_transaction_local, 'current', None) is not None
+
+
+def _statement_connection():
+    """
+    (conn, cursor, db_type, owned) for one helper call - the ambient
+    transaction's connection if there is one (owned=False: the helper
+    must not commit or close it)
+    """
+    current = getattr(_transaction_local, 'current', None)
+    if current is not None:
+        return (*current, False)
+    return (*get_db_connection(), True)
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def translate_query(query, db_type, returning_id=False):
+    """
+    SQL text to send for a helper query, computed once per distinct statement
+
+    Queries are written with ? placeholders; PostgreSQL gets %s, plus a
+    RETURNING id clause for inserts that need the new id.
+    """
+    if db_type == 'postgres':
+        query = query.replace('?', '%s')
+        if returning_id and 'RETURNING id' not in query:
+            query += ' RETURNING id'
+    return query
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _copy_statement(query):
+    """
+    COPY equivalent of a plain "INSERT INTO t (cols) VALUES (?, ...)", or
+    None if the insert has anything COPY can't express (ON CONFLICT,
+    RETURNING, expressions)
+    """
+    match = re.match(
+        r'^\s*INSERT\s+INTO\s+(\w+)\s*\(([\w\s,]+)\)\s*VALUES\s*\(([?\s,]+)\)\s*;?\s*$',
+        query,
+        re.IGNORECASE
+    )
+    if not match:
+        return None
+    columns = [column.strip() for column in match.group(2).split(',')]
+    if match.group(3).count('?') != len(columns):
+        return None
+    return f"COPY {match.group(1)} ({', '.join(columns)}) FROM STDIN"
+
+
+def _execute(cursor, db_type, query, params):
+    """Run one statement - prepared server-side on PostgreSQL, so repeats skip parse/plan"""
+    if db_type == 'postgres' and DB_PREPARE_ENABLED:
+        cursor.execute(query, params or None, prepare=True)
+    elif params:
+        cursor.execute(query, params)
+    else:
+        cursor.execute(query)
+
+
+def get_pool_stats():
+    """
+    Connection pool metrics for this process
+
+    Returns:
+        Dict with checkouts, connections opened, total wait time and, on
+        PostgreSQL, the psycopg_pool counters (pool_size, pool_available,
+        requests_waiting, ...)
+    """
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats['wait_seconds'] = round(stats['wait_seconds'], 3)
+    stats['db_type'] = get_db_type()
+    stats['pooled'] = DB_POOL_ENABLED and (stats['db_type'] == 'sqlite' or ConnectionPool is not None)
+    if _pg_pool is not None:
+        stats.update(_pg_pool.get_stats())
+    stats['statement_cache'] = translate_query.cache_info()._asdict()
+    stats['prepared_statements'] = DB_PREPARE_ENABLED and stats['db_type'] == 'postgres'
+    return stats
+
+
+def check_db_health():
+    """
+    Round-trip a trivial query through the pool
+
+    Returns:
+        (ok, latency_ms, error message or None)
+    """
+    started = time.perf_counter()
+    try:
+        execute_query('SELECT 1 AS ok', fetch='one')
+        return True, round((time.perf_counter() - started) * 1000, 1), None
+    except Exception as e:
+        return False, round((time.perf_counter() - started) * 1000, 1), str(e)
+
 def execute_query(query, params=None, fetch=None):
     """
     Execute a database query with automatic connection handling
@@ -59,17 +353,13 @@ def execute_query(query, params=None, fetch=None):
     Returns:
         Query results or None
     """
-    conn, cursor, db_type = get_db_connection()
+    conn, cursor, db_type, owned = _statement_connection()
 
-    # Convert query placeholders if needed
-    if db_type == 'postgres' and '?' in query:
-        query = query.replace('?', '%s')
+    # Convert query placeholders if needed (cached per statement)
+    query = translate_query(query, db_type)
 
     try:
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
+        _execute(cursor, db_type, query, params)
 
         if fetch == 'one':
             result = cursor.fetchone()
@@ -82,11 +372,13 @@ def execute_query(query, params=None, fetch=None):
         else:
             result = None
 
-        conn.commit()
+        if owned:
+            conn.commit()
         return result
 
     finally:
-        conn.close()
+        if owned:
+            conn.close()
 
 def execute_insert(query, params, return_id=True):
     """
@@ -100,16 +392,13 @@ def execute_insert(query, params, return_id=True):
     Returns:
         New row ID or None
     """
-    conn, cursor, db_type = get_db_connection()
+    conn, cursor, db_type, owned = _statement_connection()
 
-    # Convert query placeholders if needed
-    if db_type == 'postgres':
-        query = query.replace('?', '%s')
-        if return_id and 'RETURNING id' not in query:
-            query += ' RETURNING id'
+    # Convert query placeholders if needed (cached per statement)
+    query = translate_query(query, db_type, returning_id=return_id)
 
     try:
-        cursor.execute(query, params)
+        _execute(cursor, db_type, query, params)
 
         if return_id:
             if db_type == 'postgres':
@@ -121,11 +410,51 @@ def execute_insert(query, params, return_id=True):
         else:
             new_id = None
 
-        conn.commit()
+        if owned:
+            conn.commit()
         return new_id
 
     finally:
-        conn.close()
+        if owned:
+            conn.close()
+
+def execute_many(query, params_seq):
+    """
+    Run one statement for many parameter rows in a single round trip/commit
+    Joins the ambient transaction if there is one.
+
+    PostgreSQL: plain INSERTs of DB_COPY_MIN_ROWS+ rows stream through COPY,
+    anything else uses executemany (pipelined by psycopg). SQLite: executemany.
+
+    Args:
+        query: SQL statement with ? placeholders
+        params_seq: Sequence of parameter tuples
+
+    Returns:
+        Number of rows sent
+    """
+    params_seq = list(params_seq)
+    if not params_seq:
+        return 0
+
+    conn, cursor, db_type, owned = _statement_connection()
+
+    try:
+        copy_sql = _copy_statement(query) if db_type == 'postgres' and len(params_seq) >= DB_COPY_MIN_ROWS else None
+        if copy_sql:
+            with cursor.copy(copy_sql) as copy:
+                for params in params_seq:
+                    copy.write_row(params)
+        else:
+            cursor.executemany(translate_query(query, db_type), params_seq)
+
+        if owned:
+            conn.commit()
+        return len(params_seq)
+
+    finally:
+        if owned:
+            conn.close()
 
 def get_db_type():
     """Return current database type: 'postgres' or 'sqlite'"""
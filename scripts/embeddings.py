@@ -0,0 +1,453 @@
+"""
+Embedding Provider for Life OS RAG
+OpenAI text-embedding-3-small (384 dims) with batched, concurrent requests
+Set EMBEDDING_PROVIDER=stub to use a deterministic local embedder (offline benchmarks, no API key)
+
+Embeddings are cached on disk keyed by (provider, model, dimensions, text hash), so unchanged
+items and repeated queries never pay a network round trip twice. Search queries additionally
+go through a small in-memory LRU (get_query_embedding) so repeated questions skip even that.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
+from .api_clients import get_openai_client, record_call
+
+# OpenAI API configuration
+# text-embedding-3-small: High quality, low cost ($0.02/1M tokens)
+# Using 384 dimensions to match previous all-MiniLM-L6-v2 model
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIMENSIONS = 384
+
+# Inputs per embeddings request (API limit is 2048) and requests in flight at once
+BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', 256))
+MAX_CONCURRENT_REQUESTS = int(os.getenv('EMBEDDING_CONCURRENCY', 4))
+
+# Persistent embedding cache (SQLite file, shared by all processes on this machine)
+EMBEDDING_CACHE_PATH = Path(__file__).parent.parent / 'embedding_cache.db'
+EMBEDDING_CACHE_ENABLED = os.getenv('EMBEDDING_CACHE', 'on').lower() not in ('off', '0', 'false')
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv('EMBEDDING_CACHE_MAX_ENTRIES', 100000))
+# Eviction trims the cache to this share of the limit, so the next one is
+# thousands of writes away instead of on every insert once the cache is full
+EMBEDDING_CACHE_EVICT_TO = 0.9
+
+# SQLite connections can't be shared across threads - one per thread
+_cache_local = threading.local()
+
+# Upper bound on the cache's row count in this process, so writes only
+# run COUNT(*) when an eviction might be due (None until first counted)
+_cache_size = {'rows': None}
+_cache_size_lock = threading.Lock()
+
+# In-memory LRU for search query embeddings (per process)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 512))
+QUERY_CACHE_TTL_SECONDS = int(os.getenv('QUERY_CACHE_TTL_SECONDS', 3600))
+_query_cache = OrderedDict()  # normalized query -> (expires_at, embedding)
+_query_cache_lock = threading.Lock()
+_query_cache_stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+# Embedder override set via set_embedder() (None = use EMBEDDING_PROVIDER)
+_embedder = None
+
+
+def openai_embedder(texts):
+    """
+    Embed a batch of texts with a single OpenAI embeddings request
+
+    Args:
+        texts: List of strings
+
+    Returns:
+        List of embeddings (lists of floats) in input order
+    """
+    try:
+        # Shared client (api_clients.py) - keep-alive pool, timeouts, retries
+        client = get_openai_client()
+        with record_call('openai'):
+            response = client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=texts,
+                dimensions=EMBEDDING_DIMENSIONS  # Match old model dimensions for compatibility
+            )
+    except Exception as e:
+        print(f"[Embeddings] Error getting embeddings from OpenAI: {e}")
+        raise
+
+    # Results carry their input index - don't rely on response ordering
+    data = sorted(response.data, key=lambda d: d.index)
+    return [d.embedding for d in data]
+
+
+def stub_embedder(texts):
+    """
+    Deterministic local embedder - unit vectors seeded by a hash of each text
+    Same text always gives the same vector; similarity carries no meaning.
+    """
+    embeddings = []
+    for text in texts:
+        seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'little')
+        vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIMENSIONS).astype(np.float32)
+        embeddings.append((vector / np.linalg.norm(vector)).tolist())
+    return embeddings
+
+
+EMBEDDERS = {
+    'openai': openai_embedder,
+    'stub': stub_embedder,
+}
+
+
+def set_embedder(embedder):
+    """
+    Plug in a custom embedder for this process
+
+    Args:
+        embedder: Callable taking a list of texts and returning a list of
+                  embeddings, a name from EMBEDDERS, or None to go back to
+                  the EMBEDDING_PROVIDER default
+    """
+    global _embedder
+    _embedder = EMBEDDERS[embedder] if isinstance(embedder, str) else embedder
+
+
+def get_embedder():
+    """Return the active embedder callable"""
+    if _embedder is not None:
+        return _embedder
+
+    provider = os.getenv('EMBEDDING_PROVIDER', 'openai')
+    if provider not in EMBEDDERS:
+        raise Exception(f"Unknown EMBEDDING_PROVIDER: {provider} (expected one of {', '.join(EMBEDDERS)})")
+    return EMBEDDERS[provider]
+
+
+def get_embedding_provider():
+    """Name of the active embedder, recorded in vector store metadata"""
+    embedder = get_embedder()
+    for name, candidate in EMBEDDERS.items():
+        if candidate is embedder:
+            return name
+    return getattr(embedder, '__name__', 'custom')
+
+
+# ==================== EMBEDDING CACHE ====================
+
+def _cache_namespace():
+    """Cache key prefix for the active provider, model and dimensions"""
+    return f"{get_embedding_provider()}\x00{EMBEDDING_MODEL}\x00{EMBEDDING_DIMENSIONS}\x00"
+
+
+def _cache_key(namespace, text):
+    """Cache key: hash of the namespace plus the exact text"""
+    return hashlib.sha256((namespace + text).encode('utf-8')).hexdigest()
+
+
+def _get_cache_connection():
+    """Open (once per thread) the cache database"""
+    conn = getattr(_cache_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(EMBEDDING_CACHE_PATH, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache (last_used)')
+        conn.commit()
+        _cache_local.conn = conn
+    return conn
+
+
+def _cache_lookup(keys):
+    """
+    Fetch cached embeddings and refresh their LRU timestamp
+
+    Returns:
+        Dict of key -> embedding (list of floats) for keys found
+    """
+    conn = _get_cache_connection()
+    found = {}
+
+    # Stay under SQLite's bound-parameter limit
+    for start in range(0, len(keys), 500):
+        chunk = keys[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f'SELECT key, embedding FROM embedding_cache WHERE key IN ({placeholders})',
+            chunk
+        ).fetchall()
+        for key, blob in rows:
+            found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+    if found:
+        now = time.time()
+        conn.executemany(
+            'UPDATE embedding_cache SET last_used = ? WHERE key = ?',
+            [(now, key) for key in found]
+        )
+        conn.commit()
+
+    return found
+
+
+def _cache_store(entries):
+    """
+    Save new embeddings and evict least-recently-used entries over the limit
+
+    Args:
+        entries: Dict of key -> embedding
+    """
+    conn = _get_cache_connection()
+    now = time.time()
+
+    conn.executemany(
+        'INSERT OR REPLACE INTO embedding_cache (key, embedding, last_used) VALUES (?, ?, ?)',
+        [(key, np.asarray(embedding, dtype=np.float32).tobytes(), now) for key, embedding in entries.items()]
+    )
+
+    # Replaced keys are counted as new, so the estimate only errs high
+    with _cache_size_lock:
+        if _cache_size['rows'] is not None:
+            _cache_size['rows'] += len(entries)
+        due = _cache_size['rows'] is None or _cache_size['rows'] > EMBEDDING_CACHE_MAX_ENTRIES
+
+    if due:
+        # Exact count (other processes write to the same file too)
+        total = conn.execute('SELECT COUNT(*) FROM embedding_cache').fetchone()[0]
+        if total > EMBEDDING_CACHE_MAX_ENTRIES:
+            keep = int(EMBEDDING_CACHE_MAX_ENTRIES * EMBEDDING_CACHE_EVICT_TO)
+            conn.execute(
+                '''DELETE FROM embedding_cache WHERE key IN (
+                    SELECT key FROM embedding_cache ORDER BY last_used LIMIT ?
+                )''',
+                (total - keep,)
+            )
+            total = keep
+        with _cache_size_lock:
+            _cache_size['rows'] = total
+
+    conn.commit()
+
+
+def clear_embedding_cache():
+    """Remove every cached embedding"""
+    conn = _get_cache_connection()
+    conn.execute('DELETE FROM embedding_cache')
+    conn.commit()
+    with _cache_size_lock:
+        _cache_size['rows'] = 0
+
+
+# ==================== EMBEDDING API ====================
+
+def get_embedding(text):
+    """
+    Get embedding for a single text
+    Uses text-embedding-3-small with 384 dimensions
+
+    Args:
+        text: Text to embed
+
+    Returns:
+        List of floats (384 dimensions)
+    """
+    return get_embeddings([text])[0]
+
+
+def get_embeddings(texts, batch_size=None, max_concurrency=None, progress=False):
+    """
+    Embed many texts using batched requests with bounded concurrency
+    Cached texts are served from the embedding cache; only misses (deduplicated) hit the embedder.
+
+    Args:
+        texts: List of strings
+        batch_size: Inputs per request (default BATCH_SIZE)
+        max_concurrency: Requests in flight at once (default MAX_CONCURRENT_REQUESTS)
+        progress: Print progress after each completed batch
+
+    Returns:
+        List of embeddings in input order
+    """
+    results = [None] * len(texts)
+    if not texts:
+        return results
+
+    cached = {}
+    keys = None
+    if EMBEDDING_CACHE_ENABLED:
+        namespace = _cache_namespace()
+        keys = [_cache_key(namespace, text) for text in texts]
+        try:
+            cached = _cache_lookup(list(set(keys)))
+        except sqlite3.Error as e:
+            print(f"[Embeddings] Cache unavailable, embedding everything: {e}")
+
+    # Unique texts that still need an API call
+    pending = []
+    seen = set()
+    for i, text in enumerate(texts):
+        if keys is not None and keys[i] in cached:
+            results[i] = cached[keys[i]]
+        elif text not in seen:
+            seen.add(text)
+            pending.append(text)
+
+    if progress and EMBEDDING_CACHE_ENABLED:
+        hits = sum(result is not None for result in results)
+        print(f"[Embeddings] {hits} of {len(texts)} served from cache, {len(pending)} unique texts to embed")
+
+    if pending:
+        fresh = _embed_uncached(pending, batch_size, max_concurrency, progress)
+
+        by_text = dict(zip(pending, fresh))
+        for i, text in enumerate(texts):
+            if results[i] is None:
+                results[i] = by_text[text]
+
+        if EMBEDDING_CACHE_ENABLED:
+            try:
+                _cache_store({_cache_key(namespace, text): embedding for text, embedding in by_text.items()})
+            except sqlite3.Error as e:
+                print(f"[Embeddings] Failed to update cache: {e}")
+
+    return results
+
+
+def _embed_uncached(texts, batch_size=None, max_concurrency=None, progress=False):
+    """Send texts to the active embedder in concurrent batches (no cache)"""
+    batch_size = batch_size or BATCH_SIZE
+    max_concurrency = max_concurrency or MAX_CONCURRENT_REQUESTS
+    embedder = get_embedder()
+
+    batches = [(start, texts[start:start + batch_size]) for start in range(0, len(texts), batch_size)]
+    results = [None] * len(texts)
+
+    # Single request (e.g. one query) - skip the thread pool
+    if len(batches) == 1:
+        return embedder(texts)
+
+    started = time.perf_counter()
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batches))) as executor:
+        futures = {executor.submit(embedder, batch): (start, len(batch)) for start, batch in batches}
+
+        for future in as_completed(futures):
+            start, count = futures[future]
+            results[start:start + count] = future.result()
+            done += count
+
+            if progress:
+                elapsed = time.perf_counter() - started
+                rate = done / elapsed if elapsed > 0 else 0
+                print(f"[Embeddings] {done}/{len(texts)} embedded ({done * 100 // len(texts)}%, {rate:.0f} items/s)")
+
+    return results
+
+
+# ==================== QUERY EMBEDDING CACHE ====================
+
+def normalize_query(query):
+    """Cache key for a search query - case and whitespace insensitive"""
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+def get_query_embedding(query):
+    """
+    Embedding for a search query, served from the in-memory LRU when possible
+
+    Entries expire after QUERY_CACHE_TTL_SECONDS; the least recently used
+    entry is dropped once QUERY_CACHE_MAX_ENTRIES is reached. Misses fall
+    through to get_embedding() (and its persistent cache).
+
+    Args:
+        query: Natural language query
+
+    Returns:
+        List of floats (384 dimensions)
+    """
+    key = normalize_query(query)
+    now = time.monotonic()
+
+    with _query_cache_lock:
+        entry = _query_cache.get(key)
+        if entry is not None:
+            expires_at, embedding = entry
+            if expires_at > now:
+                _query_cache.move_to_end(key)
+                _query_cache_stats['hits'] += 1
+                return embedding
+            del _query_cache[key]
+            _query_cache_stats['expired'] += 1
+        _query_cache_stats['misses'] += 1
+
+    # Embed outside the lock so a slow API call doesn't block other lookups
+    embedding = get_embedding(re.sub(r'\s+', ' ', query).strip())
+
+    with _query_cache_lock:
+        _query_cache[key] = (now + QUERY_CACHE_TTL_SECONDS, embedding)
+        _query_cache.move_to_end(key)
+        while len(_query_cache) > QUERY_CACHE_MAX_ENTRIES:
+            _query_cache.popitem(last=False)
+            _query_cache_stats['evictions'] += 1
+
+    return embedding
+
+
+def get_query_cache_stats():
+    """Hit/miss counters and current size of the query embedding cache"""
+    with _query_cache_lock:
+        stats = dict(_query_cache_stats)
+        stats['size'] = len(_query_cache)
+
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    stats['max_entries'] = QUERY_CACHE_MAX_ENTRIES
+    stats['ttl_seconds'] = QUERY_CACHE_TTL_SECONDS
+    return stats
+
+
+def clear_query_cache():
+    """Empty the query embedding cache (counters are kept)"""
+    with _query_cache_lock:
+        _query_cache.clear()
+
+
+def main():
+    """Command-line interface - embedding throughput benchmark"""
+    import sys
+
+    if len(sys.argv) < 2 or sys.argv[1] != 'benchmark':
+        print("Usage:")
+        print("  python -m scripts.embeddings benchmark [n_items] [--stub]  - Measure embedding throughput")
+        print("Example: python -m scripts.embeddings benchmark 20000 --stub")
+        sys.exit(1)
+
+    args = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+    n_items = int(args[0]) if args else 1000
+    if '--stub' in sys.argv:
+        set_embedder('stub')
+
+    texts = [f"Benchmark: sample task number {i} (due: 2025-01-{i % 28 + 1:02d})" for i in range(n_items)]
+
+    # Measure the request pipeline, not cache reads
+    started = time.perf_counter()
+    embeddings = _embed_uncached(texts, progress=True)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n[OK] Embedded {len(embeddings)} texts with '{get_embedding_provider()}' in {elapsed:.2f}s")
+    print(f"[OK] Batch size {BATCH_SIZE}, concurrency {MAX_CONCURRENT_REQUESTS}: {len(embeddings) / elapsed:.0f} items/s")
+
+
+if __name__ == '__main__':
+    main()
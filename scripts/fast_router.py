@@ -0,0 +1,384 @@
+"""
+Fast-path Router for Life OS
+Rule-based classifier for the health-logging tools (log_water, log_sleep,
+log_sauna, log_exercise, log_inbody) - routes obvious messages like
+"2 cups of water" or "slept 7.5 hours" without a Claude call
+
+A message is only fast-routed when it reports something already done -
+past tense ("slept 7 hours", "drank 3 cups") or quantity first ("2 cups of
+water", "30 min run") - and every word is explained by the grammar
+(quantities, dates, the tool's keywords and filler words). Anything else -
+questions, plans and to-dos ("drink 8 cups of water", "go gym 1 hour"),
+extra detail - returns None and route_message falls back to the LLM.
+
+Set FAST_ROUTER=off to always use the LLM.
+"""
+
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+FAST_ROUTER_ENABLED = os.getenv('FAST_ROUTER', 'on').lower() != 'off'
+
+# Share of the message's words the grammar must explain (1.0 = all of them)
+FAST_ROUTER_MIN_CONFIDENCE = float(os.getenv('FAST_ROUTER_MIN_CONFIDENCE', 1.0))
+
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12
+}
+
+NUM = r'(\d+(?:\.\d+)?|' + '|'.join(NUMBER_WORDS) + r')'
+HOURS = r'(?:hours?|hrs?|h)'
+# Bare 'm' only when attached to the number ('30m') - 'ran 5 m' is metres or miles
+MINUTES = r'(?:minutes?|mins?|(?<=\d)m)'
+
+# (pattern, minutes(match)) - tried in order, longest forms first
+DURATION_PATTERNS = [
+    (re.compile(rf'\b{NUM}\s*{HOURS}\s*(?:and\s+)?(\d+)\s*{MINUTES}\b'),
+     lambda m: _number(m.group(1)) * 60 + float(m.group(2))),
+    (re.compile(r'\b(\d+)h(\d+)\b'),
+     lambda m: float(m.group(1)) * 60 + float(m.group(2))),
+    (re.compile(rf'\b{NUM}\s*{HOURS}\s+and\s+a\s+half\b'),
+     lambda m: _number(m.group(1)) * 60 + 30),
+    (re.compile(r'\bhalf\s+an?\s+hour\b'),
+     lambda m: 30.0),
+    (re.compile(rf'\b{NUM}\s*{HOURS}\b'),
+     lambda m: _number(m.group(1)) * 60),
+    (re.compile(rf'\b{NUM}\s*{MINUTES}\b'),
+     lambda m: _number(m.group(1)))
+]
+
+CUPS_PATTERN = re.compile(rf'\b{NUM}\s*(?:cups?|glass(?:es)?)\b')
+VISITS_PATTERN = re.compile(rf'\b{NUM}\s+(?:sauna\s+)?(?:sessions|visits|rounds)\b')
+
+# Phrase -> days before today (None = the tool's default date)
+DATE_PATTERN = re.compile(r'\b(today|tonight|this morning|this afternoon|this evening|last night|yesterday)\b')
+DAYS_AGO = {'yesterday': 1, 'last night': 1}
+
+# Keyword that identifies each tool ('exercise' is matched through ACTIVITIES)
+TOOL_KEYWORDS = {
+    'log_water': re.compile(r'\bwater\b'),
+    'log_sleep': re.compile(r'\b(?:slept|sleep|asleep)\b'),
+    'log_sauna': re.compile(r'\bsauna\b')
+}
+
+# Activity words -> activity_type (names match what the LLM has been logging)
+ACTIVITIES = [
+    (re.compile(r'\b(?:gym|workout|worked out|lifting|lifted|weights)\b'), 'Gym'),
+    (re.compile(r'\bpickleball\b'), 'Pickleball'),
+    (re.compile(r'\b(?:bjj|jiu jitsu|jiujitsu|jiu-jitsu)\b'), 'BJJ'),
+    (re.compile(r'\byoga\b'), 'Yoga'),
+    (re.compile(r'\b(?:run|ran|running|jog|jogged|jogging)\b'), 'Running'),
+    (re.compile(r'\b(?:walk|walked|walking)\b'), 'Walking'),
+    (re.compile(r'\b(?:swim|swam|swimming)\b'), 'Swimming'),
+    (re.compile(r'\b(?:bike|biked|biking|cycling|cycled|spin)\b'), 'Cycling'),
+    (re.compile(r'\btennis\b'), 'Tennis'),
+    (re.compile(r'\bbasketball\b'), 'Basketball'),
+    (re.compile(r'\b(?:hike|hiked|hiking)\b'), 'Hiking')
+]
+
+# Labelled measurements first, so an unlabelled 'NNN lbs' is left for weight
+INBODY_PATTERNS = {
+    'smm': re.compile(r'\bsmm\s*(\d+(?:\.\d+)?)\s*(?:lbs?)?'),
+    'pbf': re.compile(r'\b(?:pbf|body fat|bf)\s*(\d+(?:\.\d+)?)\s*%?'),
+    'ecw_tbw_ratio': re.compile(r'\becw(?:\s*/\s*tbw)?(?:\s+ratio)?\s*(\d*\.\d+)'),
+    'weight': re.compile(r'(?:\b(?:weight|wt)\s*(\d+(?:\.\d+)?)\s*(?:lbs?|pounds)?|\b(\d+(?:\.\d+)?)\s*(?:lbs?|pounds)\b)')
+}
+
+# Words that carry no information for logging. Verbs are past tense only -
+# present/imperative forms ("drink", "go", "hit") read as tasks, not logs
+FILLER_WORDS = {
+    'i', "i've", 'ive', 'just', 'had', 'did', 'done', 'got', 'went', 'played', 'drank',
+    'finished', 'completed',
+    'for', 'of', 'in', 'at', 'the', 'a', 'an', 'my', 'and', 'about', 'around', 'roughly',
+    'session', 'sessions', 'each', 'total', 'worth', 'some', 'more', 'another', 'log',
+    'logged', 'scan', 'results', 'result', 'inbody', 'tbw', 'ratio', 'lbs', 'lb', '%',
+    '-', '/', '+'
+}
+
+# Words a log can open with (after "I", "just"): past-tense verbs; anything
+# else must start with a quantity
+SUBJECT_WORDS = {'i', "i've", 'ive', 'just'}
+PAST_TENSE_WORDS = {
+    'had', 'did', 'done', 'got', 'went', 'played', 'drank', 'finished', 'completed',
+    'logged', 'slept', 'worked', 'lifted', 'ran', 'jogged', 'walked', 'swam', 'biked',
+    'cycled', 'hiked', 'spent'
+}
+QUANTITY_START = re.compile(rf'^(?:{NUM}\b|\d|half\b)')
+
+# Questions never take the fast path
+QUESTION_WORDS = {'what', 'how', 'when', 'show', 'was', 'were', 'is', 'are', 'which', 'why', 'list'}
+
+
+def _number(token):
+    """'7.5' / 'two' / 'an' -> float"""
+    return float(NUMBER_WORDS.get(token, token))
+
+
+def _normalize(message):
+    """Lowercase, punctuation -> spaces (keeping decimals, '/' and '%')"""
+    text = message.lower().replace('’', "'")
+    text = re.sub(r'[,;:!()\[\]"]', ' ', text)
+    text = re.sub(r'\.(?!\d)', ' ', text)
+    return ' '.join(text.split())
+
+
+def _take(pattern, text):
+    """First match of pattern and the text with it blanked out"""
+    match = pattern.search(text)
+    if not match:
+        return None, text
+    return match, text[:match.start()] + ' ' + text[match.end():]
+
+
+def _take_duration(text):
+    """(minutes or None, remaining text)"""
+    for pattern, minutes in DURATION_PATTERNS:
+        match, rest = _take(pattern, text)
+        if match:
+            return minutes(match), rest
+    return None, text
+
+
+def _date_for(phrase, tool):
+    """Date phrase -> ISO date, or None for the tool's own default"""
+    if phrase is None or phrase not in DAYS_AGO:
+        return None
+    if tool == 'log_sleep':
+        return None  # log_sleep already defaults to last night
+    return (datetime.now().date() - timedelta(days=DAYS_AGO[phrase])).isoformat()
+
+
+def _confidence(text, total_words):
+    """Share of the original words explained once recognised spans are removed"""
+    leftover = [word for word in text.split() if word not in FILLER_WORDS]
+    if not total_words:
+        return 0.0
+    return 1 - len(leftover) / total_words
+
+
+def _is_log_phrasing(text):
+    """True if the message opens with a past-tense verb or a quantity"""
+    words = text.split()
+    while words and words[0] in SUBJECT_WORDS:
+        words.pop(0)
+    if not words:
+        return False
+    return words[0] in PAST_TENSE_WORDS or bool(QUANTITY_START.match(words[0]))
+
+
+def _route_inbody(text):
+    """log_inbody parameters if all four measurements are labelled"""
+    result = {'tool': 'log_inbody'}
+    for field, pattern in INBODY_PATTERNS.items():
+        match, text = _take(pattern, text)
+        if not match:
+            return None, text
+        result[field] = float(next(group for group in match.groups() if group))
+    result['notes'] = None
+    return result, text
+
+
+def classify_message(message):
+    """
+    Classify a message with the rule-based grammar
+
+    Args:
+        message: Raw user message
+
+    Returns:
+        (routing dict in route_message's format or None, confidence 0-1)
+    """
+    if '?' in message:
+        return None, 0.0
+
+    text = _normalize(message)
+    words = text.split()
+    if not words or words[0] in QUESTION_WORDS:
+        return None, 0.0
+
+    date_match, text = _take(DATE_PATTERN, text)
+    date_phrase = date_match.group(1) if date_match else None
+
+    if 'inbody' in text.replace(' ', ''):
+        result, text = _route_inbody(text)
+        if result is None:
+            return None, 0.0
+        result['date'] = _date_for(date_phrase, 'log_inbody')
+        return result, _confidence(text, len(words))
+
+    # "drink 8 cups of water" is a to-do, "drank 8 cups of water" a log
+    if not _is_log_phrasing(text):
+        return None, 0.0
+
+    # Exactly one tool must be signalled
+    tools = [tool for tool, pattern in TOOL_KEYWORDS.items() if pattern.search(text)]
+    activity = None
+    for pattern, name in ACTIVITIES:
+        if pattern.search(text):
+            if activity is not None:
+                return None, 0.0  # two activities - let the LLM decide
+            activity, text = name, pattern.sub(' ', text)
+    if activity:
+        tools.append('log_exercise')
+    if len(tools) != 1:
+        if not tools and CUPS_PATTERN.search(text):
+            tools = ['log_water']  # "drank 1 cup"
+        else:
+            return None, 0.0
+    tool = tools[0]
+
+    if tool in TOOL_KEYWORDS:
+        text = TOOL_KEYWORDS[tool].sub(' ', text)
+    date = _date_for(date_phrase, tool)
+
+    if tool == 'log_water':
+        match, text = _take(CUPS_PATTERN, text)
+        if not match:
+            return None, 0.0
+        cups = _number(match.group(1))
+        if cups != int(cups) or not 1 <= cups <= 30:
+            return None, 0.0
+        result = {'tool': tool, 'cups': int(cups), 'date': date}
+
+    elif tool == 'log_sleep':
+        minutes, text = _take_duration(text)
+        if not minutes or minutes > 24 * 60:
+            return None, 0.0
+        result = {'tool': tool, 'hours': round(minutes / 60, 2), 'date': date, 'notes': None}
+
+    elif tool == 'log_sauna':
+        visits_match, text = _take(VISITS_PATTERN, text)
+        minutes, text = _take_duration(text)
+        if not minutes or minutes > 600:
+            return None, 0.0
+        visits = int(_number(visits_match.group(1))) if visits_match else 1
+        result = {'tool': tool, 'duration_minutes': int(round(minutes)), 'num_visits': visits, 'date': date}
+
+    else:
+        minutes, text = _take_duration(text)
+        if not minutes or minutes > 600:
+            return None, 0.0
+        result = {'tool': tool, 'activity_type': activity, 'duration_minutes': int(round(minutes)), 'date': date, 'notes': None}
+
+    return result, _confidence(text, len(words))
+
+
+def fast_route(message):
+    """
+    Routing dict for obvious health-logging messages, None to use the LLM
+
+    Args:
+        message: Raw user message
+
+    Returns:
+        Same dict shape route_message returns, or None
+    """
+    if not FAST_ROUTER_ENABLED:
+        return None
+    result, confidence = classify_message(message)
+    if result is None or confidence < FAST_ROUTER_MIN_CONFIDENCE:
+        return None
+    return result
+
+
+# ==================== BENCHMARK ====================
+
+def _load_corpus(path):
+    """
+    Messages to benchmark: one per line, optionally 'expected_tool<TAB>message'
+    Without a path, the examples from tools_manifest.TOOLS (labelled with their tool)
+    """
+    if path is None:
+        from .tools_manifest import TOOLS
+        return [(tool, example) for tool, spec in TOOLS.items() for example in spec['examples']]
+
+    corpus = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if not line.strip():
+                continue
+            if '\t' in line:
+                expected, message = line.split('\t', 1)
+                corpus.append((expected.strip() or None, message))
+            else:
+                corpus.append((None, line))
+    return corpus
+
+
+def run_benchmark(path=None, repeat=100):
+    """
+    Fast-path hit rate, accuracy and latency over a message corpus
+
+    Args:
+        path: Corpus file (see _load_corpus), None for the manifest examples
+        repeat: Classifications per message for the latency figures
+    """
+    corpus = _load_corpus(path)
+    if not corpus:
+        print("Empty corpus")
+        return
+
+    hits = 0
+    wrong = []
+    timings = []
+
+    for expected, message in corpus:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = fast_route(message)
+        timings.append((time.perf_counter() - started) * 1e6 / repeat)
+
+        routed = result['tool'] if result else None
+        if result:
+            hits += 1
+            if expected and routed != expected:
+                wrong.append((expected, routed, message))
+        print(f"  {routed or '-> LLM':<13} {message}")
+
+    timings.sort()
+    labelled_health = [e for e, _ in corpus if e and e.startswith('log_')]
+    print(f"\n{'='*60}")
+    print(f"Messages:          {len(corpus)}")
+    print(f"Fast-path hits:    {hits} ({hits / len(corpus):.0%})")
+    if labelled_health:
+        health_hits = sum(
+            1 for expected, message in corpus
+            if expected and expected.startswith('log_') and fast_route(message)
+        )
+        print(f"Health-log hits:   {health_hits}/{len(labelled_health)} ({health_hits / len(labelled_health):.0%})")
+    print(f"Misrouted:         {len(wrong)}")
+    for expected, routed, message in wrong:
+        print(f"  expected {expected}, got {routed}: {message}")
+    print(f"Latency:           p50 {timings[len(timings) // 2]:.1f} us, "
+          f"p99 {timings[min(len(timings) - 1, int(len(timings) * 0.99))]:.1f} us, "
+          f"mean {sum(timings) / len(timings):.1f} us per message")
+    print(f"{'='*60}")
+
+
+def main():
+    """Command-line interface - classify one message or benchmark a corpus"""
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage:")
+        print("  python -m scripts.fast_router '<message>'            - Show the fast-path result")
+        print("  python -m scripts.fast_router benchmark [corpus.txt] - Hit rate and latency")
+        print("Corpus: one message per line, optionally 'expected_tool<TAB>message'")
+        sys.exit(1)
+
+    if sys.argv[1] == 'benchmark':
+        run_benchmark(sys.argv[2] if len(sys.argv) > 2 else None)
+        return
+
+    message = ' '.join(sys.argv[1:])
+    result, confidence = classify_message(message)
+    print(f"Confidence: {confidence:.2f}")
+    print(f"Result:     {result if result and confidence >= FAST_ROUTER_MIN_CONFIDENCE else 'fall back to LLM'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""
+Lexical (BM25) Index for Life OS RAG
+Inverted index over task/note text for exact-name queries ("Hamilton Deli")
+and as a fully local fallback when the embedding API is unavailable
+"""
+
+import re
+import math
+import numpy as np
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Function words and question scaffolding ("what are my ...") - not indexed
+# and ignored in queries, so a query only matches items on its content words
+STOPWORDS = frozenset({
+    'a', 'about', 'all', 'am', 'an', 'and', 'any', 'are', 'as', 'at', 'be',
+    'been', 'but', 'by', 'can', 'could', 'did', 'do', 'does', 'for', 'from',
+    'had', 'has', 'have', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its',
+    'me', 'my', 'need', 'of', 'on', 'or', 'our', 'should', 'show', 'so',
+    'some', 'that', 'the', 'their', 'them', 'there', 'these', 'this', 'those',
+    'to', 'up', 'was', 'we', 'were', 'what', 'when', 'where', 'which', 'who',
+    'why', 'will', 'with', 'would', 'you', 'your'
+})
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords, with light plural folding (vendors -> vendor)"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def item_text(item):
+    """Text indexed for an item - category plus content"""
+    return f"{item['category']} {item['content']}"
+
+
+class BM25Index:
+    """
+    BM25 inverted index keyed by store row
+
+    postings[term] maps row -> term frequency; doc_lengths[row] is the
+    token count of each indexed row (0 for rows not indexed, e.g. deleted
+    items). Never modified once built - with_rows() returns an updated copy
+    that shares the untouched posting lists.
+    """
+
+    def __init__(self, postings, doc_lengths, doc_count, total_length):
+        self.postings = postings
+        self.doc_lengths = doc_lengths
+        self.doc_count = doc_count
+        self.total_length = total_length
+
+    @classmethod
+    def build(cls, texts):
+        """
+        Index one text per row
+
+        Args:
+            texts: List of strings, None for rows that should not be indexed
+        """
+        empty = cls({}, np.zeros(0, dtype=np.int32), 0, 0)
+        return empty.with_rows([(row, None, text) for row, text in enumerate(texts)], len(texts))
+
+    def with_rows(self, changes, n_rows):
+        """
+        Copy of the index with rows re-indexed
+
+        Args:
+            changes: List of (row, old_text, new_text) - old_text None for rows
+                     not indexed yet, new_text None to remove the row
+            n_rows: Row count of the store the index describes (may have grown)
+        """
+        postings = dict(self.postings)
+        doc_lengths = np.zeros(n_rows, dtype=np.int32)
+        doc_lengths[:len(self.doc_lengths)] = self.doc_lengths
+        doc_count = self.doc_count
+        total_length = self.total_length
+        copied = set()
+
+        def posting_list(term):
+            # Copy-on-write per term - snapshots still in use keep their lists
+            if term not in copied:
+                postings[term] = dict(postings.get(term, {}))
+                copied.add(term)
+            return postings[term]
+
+        for row, old_text, new_text in changes:
+            if doc_lengths[row] and old_text is not None:
+                for term in set(tokenize(old_text)):
+                    rows = posting_list(term)
+                    rows.pop(row, None)
+                    if not rows:
+                        del postings[term]
+                        copied.discard(term)
+                doc_count -= 1
+                total_length -= int(doc_lengths[row])
+                doc_lengths[row] = 0
+
+            tokens = tokenize(new_text) if new_text is not None else []
+            if not tokens:
+                continue
+            for term in tokens:
+                rows = posting_list(term)
+                rows[row] = rows.get(row, 0) + 1
+            doc_lengths[row] = len(tokens)
+            doc_count += 1
+            total_length += len(tokens)
+
+        return BM25Index(postings, doc_lengths, doc_count, total_length)
+
+    def scores(self, query):
+        """
+        BM25 score of every row for a query
+
+        Returns:
+            float32 array of length len(doc_lengths) (0 for rows without matches)
+        """
+        scores = np.zeros(len(self.doc_lengths), dtype=np.float32)
+        if not self.doc_count:
+            return scores
+
+        average_length = self.total_length / self.doc_count
+        for term in set(tokenize(query)):
+            rows = self.postings.get(term)
+            if not rows:
+                continue
+            idf = math.log(1 + (self.doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+            row_ids = np.fromiter(rows.keys(), dtype=np.int64, count=len(rows))
+            tf = np.fromiter(rows.values(), dtype=np.float32, count=len(rows))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[row_ids] / average_length)
+            scores[row_ids] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, k, mask=None):
+        """
+        Top-k rows by BM25 score
+
+        Args:
+            query: Query text
+            k: Number of results
+            mask: Optional boolean row mask - False rows are never returned
+
+        Returns:
+            (rows, scores) best first; only rows sharing a term with the query
+        """
+        scores = self.scores(query)
+        if mask is not None:
+            scores[~mask[:len(scores)]] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores[candidates], k - 1)[:k]
+        top = top[np.argsort(-scores[candidates][top], kind='stable')]
+        return candidates[top], scores[candidates][top]
@@ -0,0 +1,116 @@
+"""
+Quantized Embedding Matrices for Life OS RAG
+Resident float16 / int8 copies of the float32 store, scored chunk by chunk
+
+VECTOR_STORE_QUANTIZATION:
+- none:    search the float32 memory map directly (default)
+- float16: 2x smaller, half-precision values
+- int8:    4x smaller, symmetric per-vector scale (row = codes * scale)
+
+The float32 base stays on disk as the source of truth, so compaction never
+compounds quantization error and the top candidates can be rescored exactly.
+"""
+
+import os
+import numpy as np
+
+QUANTIZATION = os.getenv('VECTOR_STORE_QUANTIZATION', 'none').lower()
+
+# Rescore this many candidates per requested result against the float32 rows
+# (0 = return quantized scores as-is)
+RESCORE_FACTOR = int(os.getenv('VECTOR_STORE_RESCORE_FACTOR', 4))
+
+QUANTIZED_DTYPES = {'float16': np.float16, 'int8': np.int8}
+
+# Rows converted to float32 per BLAS call - small enough to stay in L2 cache
+SCORE_CHUNK_ROWS = 256
+
+
+class QuantizedMatrix:
+    """
+    float16 or int8 copy of an (N, D) embedding matrix
+
+    Supports len(), row indexing (matrix[rows]) and matrix @ query, so it
+    can stand in for the float32 matrix in top_k_similarities and the ANN
+    index. Never modified once built - with_rows() returns an updated copy.
+    """
+
+    def __init__(self, codes, scales=None):
+        self.codes = codes
+        self.scales = scales  # float32 per-row scale (int8 only)
+
+    @classmethod
+    def from_float(cls, matrix, dtype):
+        """
+        Quantize a float32 matrix
+
+        Args:
+            matrix: (N, D) array-like of float32 rows
+            dtype: 'float16' or 'int8'
+        """
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if dtype == 'float16':
+            return cls(matrix.astype(np.float16))
+        if dtype != 'int8':
+            raise ValueError(f"Unknown quantization: {dtype}")
+
+        scales = np.abs(matrix).max(axis=-1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(matrix / scales[..., None]).astype(np.int8)
+        return cls(codes, scales.astype(np.float32))
+
+    @property
+    def dtype(self):
+        return 'int8' if self.scales is not None else 'float16'
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, rows):
+        return QuantizedMatrix(
+            self.codes[rows],
+            self.scales[rows] if self.scales is not None else None
+        )
+
+    def __matmul__(self, query):
+        """Approximate dot product of every row with a float32 query vector"""
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((SCORE_CHUNK_ROWS, self.codes.shape[1]), dtype=np.float32)
+
+        for start in range(0, len(self.codes), SCORE_CHUNK_ROWS):
+            chunk = self.codes[start:start + SCORE_CHUNK_ROWS]
+            np.copyto(buffer[:len(chunk)], chunk, casting='unsafe')
+            np.dot(buffer[:len(chunk)], query, out=scores[start:start + len(chunk)])
+
+        if self.scales is not None:
+            scores *= self.scales
+        return scores
+
+    def with_rows(self, rows, embeddings):
+        """
+        Copy with rows re-quantized from the float32 matrix
+
+        Args:
+            rows: Row numbers that were replaced or appended
+            embeddings: Full float32 matrix (may have grown)
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if len(rows) == 0:
+            return self
+
+        grown = len(embeddings) - len(self.codes)
+        codes = np.concatenate([self.codes, np.zeros((grown, self.codes.shape[1]), dtype=self.codes.dtype)])
+        scales = None
+        if self.scales is not None:
+            scales = np.concatenate([self.scales, np.ones(grown, dtype=np.float32)])
+
+        updated = QuantizedMatrix.from_float(embeddings[rows], self.dtype)
+        codes[rows] = updated.codes
+        if scales is not None:
+            scales[rows] = updated.scales
+        return QuantizedMatrix(codes, scales)
@@ -7,7 +7,6 @@ Phase 2 Integration - Ready for activation
 
 import os
 from datetime import datetime
-import anthropic
 from .vector_store import search_memory
 
 
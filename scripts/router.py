@@ -6,108 +6,50 @@ Routes messages to appropriate tools using Claude AI
 import os
 import json
 import sys
+import time
+import threading
 from datetime import datetime, timedelta
-import anthropic
 from .tools_manifest import get_tool_prompt
 from .vector_store import add_to_vector_store
 from .rag_query import execute_rag_query
-from .db_helper import execute_query, execute_insert
-
-
-def get_category_id(category_name):
-    """Get category ID from database by name (case-insensitive, hierarchical match)"""
-    # Try exact match first
-    result = execute_query(
-        'SELECT id FROM categories WHERE LOWER(name) = LOWER(?)',
-        (category_name,),
-        fetch='one'
-    )
-
-    if result:
-        return result['id']
-
-    # If no exact match, try hierarchical lookup
-    # E.g., "Wedding - Vendors" should find category "Vendors" with parent "Wedding"
-    if ' - ' in category_name:
-        parts = category_name.split(' - ')
-
-        # Try to find the child category with the correct parent chain
-        # Start from the end (most specific category)
-        child_name = parts[-1]
-
-        # If there's a parent specified
-        if len(parts) > 1:
-            parent_name = parts[-2]  # Immediate parent
-
-            # Find child category with matching parent
-            result = execute_query('''
-                SELECT c.id
-                FROM categories c
-                JOIN categories p ON c.parent_id = p.id
-                WHERE LOWER(c.name) = LOWER(?)
-                AND LOWER(p.name) = LOWER(?)
-            ''', (child_name, parent_name), fetch='one')
-
-            if result:
-                return result['id']
-
-        # Try just the child name (last part) as fallback
-        result = execute_query(
-            'SELECT id FROM categories WHERE LOWER(name) = LOWER(?)',
-            (child_name,),
-            fetch='one'
-        )
-
-        if result:
-            return result['id']
-
-    # Last resort: partial match (e.g., "Wedding" matches "Wedding - Vendors")
-    result = execute_query(
-        'SELECT id FROM categories WHERE LOWER(name) LIKE LOWER(?)',
-        (f'%{category_name}%',),
-        fetch='one'
-    )
-
-    return result['id'] if result else None
-
-
-def get_category_name(category_id):
-    """Get category name from database by ID"""
-    result = execute_query(
-        'SELECT name FROM categories WHERE id = ?',
-        (category_id,),
-        fetch='one'
-    )
-
-    return result['name'] if result else None
-
-
-def build_category_context():
-    """Build category list with descriptions from database"""
-    # Query all categories with their hierarchy info
-    categories = execute_query(
-        'SELECT id, name, description, parent_id FROM categories ORDER BY sort_order, name',
-        fetch='all'
-    )
-
-    if not categories:
+from .db_helper import execute_query, execute_insert, transaction
+from .category_counters import record_task_change, record_note_change
+from .fast_router import fast_route
+from .api_clients import get_anthropic_client, record_call
+
+
+# Category catalog (hierarchy, prompt text, name lookups) cached per process.
+# api_server invalidates it on category CRUD; the TTL picks up edits made by
+# the other service (the bot and the API run as separate processes)
+CATEGORY_CACHE_TTL = float(os.getenv('CATEGORY_CACHE_TTL', 300))
+
+_category_catalog = None
+_category_catalog_lock = threading.Lock()
+
+# Routing model (Haiku - cheap and fast) and prompt caching (ROUTER_PROMPT_CACHE=off disables)
+ROUTER_MODEL = os.getenv('ROUTER_MODEL', 'claude-3-5-haiku-20241022')
+ROUTER_PROMPT_CACHE = os.getenv('ROUTER_PROMPT_CACHE', 'on').lower() != 'off'
+
+_routing_stats = {
+    'fast_path': 0,
+    'llm_calls': 0,
+    'input_tokens': 0,                  # uncached prompt tokens
+    'cache_read_input_tokens': 0,
+    'cache_creation_input_tokens': 0,
+    'output_tokens': 0,
+    'cache_hit_calls': 0,
+    'cache_hit_seconds': 0.0,
+    'cache_miss_calls': 0,
+    'cache_miss_seconds': 0.0
+}
+_routing_stats_lock = threading.Lock()
+
+
+def _render_category_context(top_level, children_map):
+    """Prompt text listing categories, subcategories and descriptions"""
+    if not top_level:
         return "- Tasks: Generic catch-all tasks"
 
-    # Build hierarchical structure
-    # Group by parent_id
-    top_level = []
-    children_map = {}
-
-    for cat in categories:
-        if cat['parent_id'] is None:
-            top_level.append(cat)
-        else:
-            parent_id = cat['parent_id']
-            if parent_id not in children_map:
-                children_map[parent_id] = []
-            children_map[parent_id].append(cat)
-
-    # Build the prompt text
     lines = []
 
     for parent in top_level:
@@ -132,6 +74,127 @@ def build_category_context():
     return '\n'.join(lines)
 
 
+def _load_category_catalog():
+    """Read the categories table once and build every lookup routing needs"""
+    categories = execute_query(
+        'SELECT id, name, description, parent_id FROM categories ORDER BY sort_order, name',
+        fetch='all'
+    ) or []
+
+    # Build hierarchical structure
+    # Group by parent_id
+    top_level = []
+    children_map = {}
+    by_id = {}
+    by_name = {}   # lowercase name -> id (first in sort order, like the old LIMIT-less query)
+    by_path = {}   # (lowercase parent, lowercase child) -> id
+
+    for cat in categories:
+        by_id[cat['id']] = cat
+        by_name.setdefault(cat['name'].lower(), cat['id'])
+        if cat['parent_id'] is None:
+            top_level.append(cat)
+        else:
+            children_map.setdefault(cat['parent_id'], []).append(cat)
+
+    for cat in categories:
+        parent = by_id.get(cat['parent_id'])
+        if parent:
+            by_path.setdefault((parent['name'].lower(), cat['name'].lower()), cat['id'])
+
+    return {
+        'loaded_at': time.monotonic(),
+        'categories': categories,
+        'top_level': top_level,
+        'children': children_map,
+        'by_id': by_id,
+        'by_name': by_name,
+        'by_path': by_path,
+        'context': _render_category_context(top_level, children_map)
+    }
+
+
+def get_category_catalog(refresh=False):
+    """
+    Cached category catalog, reloaded after CATEGORY_CACHE_TTL seconds
+
+    Args:
+        refresh: Reload from the database now
+
+    Returns:
+        Dict with categories, top_level, children, by_id, by_name, by_path, context
+    """
+    global _category_catalog
+    catalog = _category_catalog
+    if not refresh and catalog and time.monotonic() - catalog['loaded_at'] < CATEGORY_CACHE_TTL:
+        return catalog
+
+    with _category_catalog_lock:
+        catalog = _category_catalog
+        if refresh or not catalog or time.monotonic() - catalog['loaded_at'] >= CATEGORY_CACHE_TTL:
+            catalog = _category_catalog = _load_category_catalog()
+    return catalog
+
+
+def invalidate_category_cache():
+    """Drop the cached catalog - call after creating, updating or deleting categories"""
+    global _category_catalog
+    _category_catalog = None
+
+
+def _resolve_category_id(catalog, category_name):
+    """Match a category name against the catalog (see get_category_id)"""
+    name = category_name.strip().lower()
+
+    # Try exact match first
+    if name in catalog['by_name']:
+        return catalog['by_name'][name]
+
+    # If no exact match, try hierarchical lookup
+    # E.g., "Wedding - Vendors" should find category "Vendors" with parent "Wedding"
+    if ' - ' in name:
+        parts = name.split(' - ')
+        child_name = parts[-1]
+        parent_name = parts[-2]  # Immediate parent
+
+        if (parent_name, child_name) in catalog['by_path']:
+            return catalog['by_path'][(parent_name, child_name)]
+
+        # Try just the child name (last part) as fallback
+        if child_name in catalog['by_name']:
+            return catalog['by_name'][child_name]
+
+    # Last resort: partial match (e.g., "Wedding" matches "Wedding Planning")
+    for cat in catalog['categories']:
+        if name in cat['name'].lower():
+            return cat['id']
+
+    return None
+
+
+def get_category_id(category_name):
+    """Get category ID by name (case-insensitive, hierarchical match) from the cached catalog"""
+    category_id = _resolve_category_id(get_category_catalog(), category_name)
+    if category_id is None:
+        # Possibly created since the catalog was loaded (by the other service)
+        category_id = _resolve_category_id(get_category_catalog(refresh=True), category_name)
+    return category_id
+
+
+def get_category_name(category_id):
+    """Get category name by ID from the cached catalog"""
+    catalog = get_category_catalog()
+    if category_id not in catalog['by_id']:
+        catalog = get_category_catalog(refresh=True)
+    category = catalog['by_id'].get(category_id)
+    return category['name'] if category else None
+
+
+def build_category_context():
+    """Category list with descriptions for the routing prompt (cached)"""
+    return get_category_catalog()['context']
+
+
 def parse_due_date(date_str):
     """Parse natural language due dates to ISO format"""
     if not date_str or date_str.lower() in ['none', 'n/a', 'tbd', 'null']:
@@ -163,31 +226,14 @@ def parse_due_date(date_str):
         return date_str
 
 
-def route_message(message):
-    """
-    Route message to appropriate tool using Claude AI
-    Returns: {
-        'tool': 'add_task' | 'add_note' | 'ask_question',
-        'parameters': {...}
-    }
+def _routing_system_prompt(category_context):
     """
+    Static part of the routing prompt - tools, categories, instructions
 
-    # Get API key from environment
-    api_key = os.getenv('ANTHROPIC_API_KEY')
-    if not api_key:
-        raise Exception("ANTHROPIC_API_KEY environment variable not set")
-
-    # Build routing prompt
-    today = datetime.now().date()
-
-    # Build dynamic category context from database
-    category_context = build_category_context()
-
-    prompt = f"""You are an intelligent routing assistant for Life OS.
-
-TODAY'S DATE: {today.isoformat()} ({today.strftime('%A, %B %d, %Y')})
-
-User Message: "{message}"
+    Identical across messages (the category list only changes when
+    categories do), so it is sent as a cached system prefix.
+    """
+    return f"""You are an intelligent routing assistant for Life OS.
 
 {get_tool_prompt()}
 
@@ -238,21 +284,99 @@ Examples of category usage in ask_question:
 - "what are my vendor tasks" → filters: {{"category": "Wedding - Vendors"}} (searches only vendors)
 - "show me home tasks" → filters: {{"category": "Home"}} (leaf category)
 
-Return ONLY valid JSON, nothing else:
-"""
+The user turn gives TODAY'S DATE (use it to resolve relative due dates) and the message to route.
+Return ONLY valid JSON, nothing else."""
 
-    try:
-        # Initialize Anthropic client
-        client = anthropic.Anthropic(api_key=api_key)
 
+def _record_routing_usage(response, seconds):
+    """Add one LLM routing call's token usage and latency to the stats"""
+    usage = response.usage
+    cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    prefix = 'hit' if cache_read else 'miss'
+
+    with _routing_stats_lock:
+        _routing_stats['llm_calls'] += 1
+        _routing_stats['input_tokens'] += usage.input_tokens
+        _routing_stats['cache_read_input_tokens'] += cache_read
+        _routing_stats['cache_creation_input_tokens'] += cache_write
+        _routing_stats['output_tokens'] += usage.output_tokens
+        _routing_stats[f'cache_{prefix}_calls'] += 1
+        _routing_stats[f'cache_{prefix}_seconds'] += seconds
+
+    print(f"[Router] {usage.input_tokens + cache_read + cache_write} prompt tokens "
+          f"({cache_read} cached, {cache_write} written to cache), {seconds * 1000:.0f} ms")
+
+
+def get_routing_stats():
+    """
+    Routing counters for this process
+
+    Returns:
+        Dict with fast-path hits, LLM calls, token totals, cache hit rate
+        and average LLM latency with and without a cache hit
+    """
+    with _routing_stats_lock:
+        stats = dict(_routing_stats)
+
+    prompt_tokens = stats['input_tokens'] + stats['cache_read_input_tokens'] + stats['cache_creation_input_tokens']
+    stats['prompt_tokens'] = prompt_tokens
+    stats['cached_token_share'] = round(stats['cache_read_input_tokens'] / prompt_tokens, 3) if prompt_tokens else 0.0
+    stats['cache_hit_rate'] = round(stats['cache_hit_calls'] / stats['llm_calls'], 3) if stats['llm_calls'] else 0.0
+    for prefix in ('hit', 'miss'):
+        calls = stats[f'cache_{prefix}_calls']
+        stats[f'avg_ms_cache_{prefix}'] = round(stats.pop(f'cache_{prefix}_seconds') * 1000 / calls, 1) if calls else None
+    return stats
+
+
+def route_message(message):
+    """
+    Route message to appropriate tool using Claude AI
+    Returns: {
+        'tool': 'add_task' | 'add_note' | 'ask_question',
+        'parameters': {...}
+    }
+    """
+
+    # Obvious health logs ("2 cups of water") are parsed locally - no API call
+    result = fast_route(message)
+    if result:
+        with _routing_stats_lock:
+            _routing_stats['fast_path'] += 1
+        print(f"[Router] Fast path: {result['tool']}")
+        return result
+
+    # Shared client (api_clients.py) - raises if ANTHROPIC_API_KEY is not set
+    client = get_anthropic_client()
+
+    today = datetime.now().date()
+
+    # Cacheable prefix (tools, categories, instructions) + small per-message suffix
+    system_prompt = _routing_system_prompt(build_category_context())
+    system_block = {"type": "text", "text": system_prompt}
+    if ROUTER_PROMPT_CACHE:
+        # Cached for 5 minutes after each use. The prefix must exceed the model's
+        # minimum cacheable length (2048 tokens on Haiku) - shorter prompts are
+        # sent uncached, which shows up as zero cache_creation_input_tokens
+        system_block["cache_control"] = {"type": "ephemeral"}
+    user_prompt = (
+        f"TODAY'S DATE: {today.isoformat()} ({today.strftime('%A, %B %d, %Y')})\n\n"
+        f'User Message: "{message}"'
+    )
+
+    try:
         # Call Claude AI API using Haiku (cheap and fast)
-        response = client.messages.create(
-            model="claude-3-5-haiku-20241022",  # Claude 3.5 Haiku - fastest and cheapest
-            max_tokens=1024,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
+        started = time.perf_counter()
+        with record_call('anthropic'):
+            response = client.messages.create(
+                model=ROUTER_MODEL,
+                max_tokens=1024,
+                system=[system_block],
+                messages=[
+                    {"role": "user", "content": user_prompt}
+                ]
+            )
+        _record_routing_usage(response, time.perf_counter() - started)
 
         # Get response text
         response_text = response.content[0].text.strip()
@@ -288,12 +412,14 @@ def execute_add_task(category_name, content, due_date=None):
     # Parse due date
     parsed_due_date = parse_due_date(due_date)
 
-    # Add to database
-    task_id = execute_insert(
-        'INSERT INTO tasks (category_id, content, due_date, created_date) VALUES (?, ?, ?, ?)',
-        (category_id, content, parsed_due_date, datetime.now().isoformat()),
-        return_id=True
-    )
+    # Add to database (and count it) in one transaction
+    with transaction():
+        task_id = execute_insert(
+            'INSERT INTO tasks (category_id, content, due_date, created_date) VALUES (?, ?, ?, ?)',
+            (category_id, content, parsed_due_date, datetime.now().isoformat()),
+            return_id=True
+        )
+        record_task_change(None, (category_id, False))
 
     # Get actual category name from DB
     actual_category = get_category_name(category_id)
@@ -330,12 +456,14 @@ def execute_add_note(category_name, content):
     if not category_id:
         raise Exception(f"Unknown category: {category_name}")
 
-    # Add to database
-    note_id = execute_insert(
-        'INSERT INTO notes (category_id, content, created_date) VALUES (?, ?, ?)',
-        (category_id, content, datetime.now().isoformat()),
-        return_id=True
-    )
+    # Add to database (and count it) in one transaction
+    with transaction():
+        note_id = execute_insert(
+            'INSERT INTO notes (category_id, content, created_date) VALUES (?, ?, ?)',
+            (category_id, content, datetime.now().isoformat()),
+            return_id=True
+        )
+        record_note_change(None, (category_id,))
 
     # Get actual category name from DB
     actual_category = get_category_name(category_id)
@@ -5,8 +5,11 @@ Industry-standard 2025 implementation using FastAPI + webhooks
 
 import os
 import sys
+import asyncio
 import secrets
+import functools
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 from fastapi import FastAPI, Request, Response, HTTPException, Header
 from telegram import Update
@@ -22,8 +25,10 @@ from .router import (
     execute_log_water,
     execute_log_exercise,
     execute_log_sauna,
-    execute_log_inbody
+    execute_log_inbody,
+    get_routing_stats
 )
+from .api_clients import get_client_stats
 
 # Environment variables
 BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -32,6 +37,16 @@ SECRET_TOKEN = os.getenv('WEBHOOK_SECRET_TOKEN')  # NEW - for security
 PORT = int(os.getenv('PORT', 8000))  # Render provides PORT env var
 WEBHOOK_URL = os.getenv('RENDER_EXTERNAL_URL')  # Render provides this
 
+# Routing, embeddings and database calls are blocking - they run on a bounded
+# thread pool so one slow Claude/OpenAI call never stalls the event loop.
+# Keep BOT_WORKER_THREADS at or below DB_POOL_MAX_SIZE.
+BOT_WORKER_THREADS = int(os.getenv('BOT_WORKER_THREADS', 8))
+
+# Updates PTB processes at once (PTB's default is one at a time)
+BOT_CONCURRENT_UPDATES = int(os.getenv('BOT_CONCURRENT_UPDATES', 16))
+
+_executor = ThreadPoolExecutor(max_workers=BOT_WORKER_THREADS, thread_name_prefix='life-os-bot')
+
 # Validate required env vars
 if not BOT_TOKEN:
     print("[ERROR] TELEGRAM_BOT_TOKEN not set")
@@ -56,10 +71,17 @@ ptb_app = (
     Application.builder()
     .token(BOT_TOKEN)
     .updater(None)  # No polling!
+    .concurrent_updates(BOT_CONCURRENT_UPDATES)  # Slow messages don't queue the rest
     .build()
 )
 
 
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the bot's worker pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
 # ==================== BOT HANDLERS (same as before) ====================
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -86,31 +108,37 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /stats command"""
+def _collect_stats():
+    """Task, note and category counts (blocking - run via run_blocking)"""
     from .db_helper import execute_query
 
+    # Get task counts
+    active = execute_query(
+        'SELECT COUNT(*) as c FROM tasks WHERE completed = ?',
+        (False,),
+        fetch='one'
+    )
+    completed = execute_query(
+        'SELECT COUNT(*) as c FROM tasks WHERE completed = ?',
+        (True,),
+        fetch='one'
+    )
+    notes = execute_query('SELECT COUNT(*) as c FROM notes', fetch='one')
+    cats = execute_query('SELECT COUNT(*) as c FROM categories', fetch='one')
+    return active['c'], completed['c'], notes['c'], cats['c']
+
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /stats command"""
     try:
-        # Get task counts
-        active = execute_query(
-            'SELECT COUNT(*) as c FROM tasks WHERE completed = ?',
-            (False,),
-            fetch='one'
-        )
-        completed = execute_query(
-            'SELECT COUNT(*) as c FROM tasks WHERE completed = ?',
-            (True,),
-            fetch='one'
-        )
-        notes = execute_query('SELECT COUNT(*) as c FROM notes', fetch='one')
-        cats = execute_query('SELECT COUNT(*) as c FROM categories', fetch='one')
+        active, completed, notes, cats = await run_blocking(_collect_stats)
 
         await update.message.reply_text(
             f"Life OS Statistics:\n\n"
-            f"Active Tasks: {active['c']}\n"
-            f"Completed Tasks: {completed['c']}\n"
-            f"Notes: {notes['c']}\n"
-            f"Categories: {cats['c']}\n\n"
+            f"Active Tasks: {active}\n"
+            f"Completed Tasks: {completed}\n"
+            f"Notes: {notes}\n"
+            f"Categories: {cats}\n\n"
             f"Mode: Webhook (Production)\n"
             f"Keep crushing it!"
         )
@@ -118,6 +146,87 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(f"Error getting stats: {e}")
 
 
+def process_message(message_text):
+    """
+    Route a message and run the chosen tool (blocking - run via run_blocking)
+
+    Returns:
+        Reply text for the user
+    """
+    # Route message (same logic as polling version)
+    routing_result = route_message(message_text)
+    tool = routing_result['tool']
+
+    if tool == 'add_task':
+        response = execute_add_task(
+            routing_result['category'],
+            routing_result['content'],
+            routing_result.get('due_date')
+        )
+        return response['message']
+
+    elif tool == 'add_note':
+        response = execute_add_note(
+            routing_result['category'],
+            routing_result['content']
+        )
+        return response['message']
+
+    elif tool == 'ask_question':
+        response = execute_ask_question(
+            routing_result['query'],
+            routing_result.get('query_type', 'all'),
+            routing_result.get('filters')
+        )
+        return response['message']
+
+    elif tool == 'log_sleep':
+        response = execute_log_sleep(
+            routing_result['hours'],
+            routing_result.get('date'),
+            routing_result.get('notes')
+        )
+        return response['message']
+
+    elif tool == 'log_water':
+        response = execute_log_water(
+            routing_result['cups'],
+            routing_result.get('date')
+        )
+        return response['message']
+
+    elif tool == 'log_exercise':
+        response = execute_log_exercise(
+            routing_result['activity_type'],
+            routing_result['duration_minutes'],
+            routing_result.get('date'),
+            routing_result.get('notes')
+        )
+        return response['message']
+
+    elif tool == 'log_sauna':
+        response = execute_log_sauna(
+            routing_result['duration_minutes'],
+            routing_result.get('num_visits', 1),
+            routing_result.get('date')
+        )
+        return response['message']
+
+    elif tool == 'log_inbody':
+        response = execute_log_inbody(
+            routing_result['weight'],
+            routing_result['smm'],
+            routing_result['pbf'],
+            routing_result['ecw_tbw_ratio'],
+            routing_result.get('date'),
+            routing_result.get('notes')
+        )
+        return response['message']
+
+    else:
+        return f"Unknown tool: {tool}"
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle incoming messages - route to appropriate tool"""
 
@@ -130,78 +239,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.chat.send_action("typing")
 
     try:
-        # Route message (same logic as polling version)
-        routing_result = route_message(message_text)
-        tool = routing_result['tool']
-
-        if tool == 'add_task':
-            response = execute_add_task(
-                routing_result['category'],
-                routing_result['content'],
-                routing_result.get('due_date')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'add_note':
-            response = execute_add_note(
-                routing_result['category'],
-                routing_result['content']
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'ask_question':
-            response = execute_ask_question(
-                routing_result['query'],
-                routing_result.get('query_type', 'all'),
-                routing_result.get('filters')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'log_sleep':
-            response = execute_log_sleep(
-                routing_result['hours'],
-                routing_result.get('date'),
-                routing_result.get('notes')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'log_water':
-            response = execute_log_water(
-                routing_result['cups'],
-                routing_result.get('date')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'log_exercise':
-            response = execute_log_exercise(
-                routing_result['activity_type'],
-                routing_result['duration_minutes'],
-                routing_result.get('date'),
-                routing_result.get('notes')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'log_sauna':
-            response = execute_log_sauna(
-                routing_result['duration_minutes'],
-                routing_result.get('num_visits', 1),
-                routing_result.get('date')
-            )
-            await update.message.reply_text(response['message'])
-
-        elif tool == 'log_inbody':
-            response = execute_log_inbody(
-                routing_result['weight'],
-                routing_result['smm'],
-                routing_result['pbf'],
-                routing_result['ecw_tbw_ratio'],
-                routing_result.get('date'),
-                routing_result.get('notes')
-            )
-            await update.message.reply_text(response['message'])
-
-        else:
-            await update.message.reply_text(f"Unknown tool: {tool}")
+        # Routing and tool calls block on Claude/OpenAI/the database - keep them off the event loop
+        reply = await run_blocking(process_message, message_text)
+        await update.message.reply_text(reply)
 
     except Exception as e:
         await update.message.reply_text(
@@ -244,6 +284,7 @@ async def lifespan(app: FastAPI):
         yield
         print("[OK] Shutting down...")
         await ptb_app.stop()
+    _executor.shutdown(wait=False)
 
 
 # Create FastAPI app
@@ -262,6 +303,12 @@ async def health_check():
     return {"status": "healthy", "mode": "webhook"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Routing metrics (fast-path hits, tokens, prompt-cache hits) and API client latency"""
+    return {"routing": get_routing_stats(), "api_clients": get_client_stats()}
+
+
 @app.post("/telegram-webhook")
 async def telegram_webhook(
     request: Request,
@@ -0,0 +1,325 @@
+"""
+Database-backed Vector Storage for Life OS RAG
+Embeddings live in the item_embeddings table, shared by the bot and API services
+
+- PostgreSQL: pgvector column with an HNSW cosine index - filtering and top-k run in SQL
+- SQLite:     float32 BLOB column, filtered in SQL and scored in-process (local dev)
+
+Selected with VECTOR_STORE_BACKEND=database (see vector_store.py)
+"""
+
+import json
+import threading
+import numpy as np
+from .db_helper import get_db_type, transaction, translate_query
+from .embeddings import EMBEDDING_DIMENSIONS
+
+EMBEDDINGS_TABLE = 'item_embeddings'
+
+ITEM_COLUMNS = 'item_id, item_type, category, content, due_date, completed, created_date'
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def _run(statements, fetch=None):
+    """
+    Run one or more statements in a single transaction (joining the
+    caller's transaction() if one is open - committed with it, not here)
+
+    Args:
+        statements: List of (query, params) - queries use ? placeholders;
+                    a list of parameter tuples runs the query with executemany
+        fetch: 'all' to return the rows of the last statement
+
+    Returns:
+        List of dicts for fetch='all', else None
+    """
+    with transaction() as (_, cursor, db_type):
+        result = None
+        for query, params in statements:
+            query = translate_query(query, db_type)
+            if isinstance(params, list):
+                if params:
+                    cursor.executemany(query, params)
+            elif params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+        if fetch == 'all':
+            result = [dict(row) for row in cursor.fetchall()]
+    return result
+
+
+def ensure_embeddings_table():
+    """Create the embeddings table (and pgvector extension/index) once per process"""
+    global _table_ready
+    if _table_ready:
+        return
+
+    with _table_lock:
+        if _table_ready:
+            return
+
+        if get_db_type() == 'postgres':
+            _run([
+                ('CREATE EXTENSION IF NOT EXISTS vector', None),
+                (f'''
+                    CREATE TABLE IF NOT EXISTS {EMBEDDINGS_TABLE} (
+                        item_id TEXT PRIMARY KEY,
+                        item_type TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        due_date TEXT,
+                        completed BOOLEAN,
+                        created_date TEXT,
+                        embedding vector({EMBEDDING_DIMENSIONS}) NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''', None),
+                (f'CREATE INDEX IF NOT EXISTS idx_{EMBEDDINGS_TABLE}_type_category ON {EMBEDDINGS_TABLE}(item_type, category)', None)
+            ])
+            try:
+                # HNSW needs pgvector >= 0.5 - without it queries fall back to a sequential scan
+                _run([(f'CREATE INDEX IF NOT EXISTS idx_{EMBEDDINGS_TABLE}_hnsw ON {EMBEDDINGS_TABLE} USING hnsw (embedding vector_cosine_ops)', None)])
+            except Exception as e:
+                print(f"[Warning] Could not create HNSW index: {e}")
+        else:
+            _run([
+                (f'''
+                    CREATE TABLE IF NOT EXISTS {EMBEDDINGS_TABLE} (
+                        item_id TEXT PRIMARY KEY,
+                        item_type TEXT NOT NULL,
+                        category TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        due_date TEXT,
+                        completed BOOLEAN,
+                        created_date TEXT,
+                        embedding BLOB NOT NULL,
+                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''', None),
+                (f'CREATE INDEX IF NOT EXISTS idx_{EMBEDDINGS_TABLE}_type_category ON {EMBEDDINGS_TABLE}(item_type, category)', None)
+            ])
+
+        _table_ready = True
+
+
+def _encode_vector(vector):
+    """Unit-length float32 vector in the column's wire format"""
+    vector = np.asarray(vector, dtype=np.float32).reshape(EMBEDDING_DIMENSIONS)
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector = vector / norm
+    if get_db_type() == 'postgres':
+        return '[' + ','.join(f'{value:.8g}' for value in vector) + ']'
+    return vector.tobytes()
+
+
+def _decode_vector(value):
+    """Column value (pgvector text or SQLite BLOB) -> float32 array"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return np.frombuffer(bytes(value), dtype=np.float32)
+    return np.asarray(json.loads(value), dtype=np.float32)
+
+
+def _row_to_item(row):
+    """Table row -> vector store item dict (same shape as the file store)"""
+    item = {
+        'id': row['item_id'],
+        'type': row['item_type'],
+        'category': row['category'],
+        'content': row['content'],
+        'created_date': row['created_date']
+    }
+    if row['item_type'] == 'task':
+        item['due_date'] = row['due_date']
+        item['completed'] = bool(row['completed'])
+    return item
+
+
+def _item_params(item, embedding):
+    completed = item.get('completed')
+    return (
+        item['id'],
+        item['type'],
+        item['category'],
+        item['content'],
+        item.get('due_date'),
+        None if completed is None else bool(completed),
+        item.get('created_date'),
+        _encode_vector(embedding)
+    )
+
+
+def _upsert_query():
+    vector_param = '?::vector' if get_db_type() == 'postgres' else '?'
+    return f'''
+        INSERT INTO {EMBEDDINGS_TABLE} ({ITEM_COLUMNS}, embedding)
+        VALUES (?, ?, ?, ?, ?, ?, ?, {vector_param})
+        ON CONFLICT (item_id) DO UPDATE SET
+            item_type = excluded.item_type,
+            category = excluded.category,
+            content = excluded.content,
+            due_date = excluded.due_date,
+            completed = excluded.completed,
+            created_date = excluded.created_date,
+            embedding = excluded.embedding,
+            updated_at = CURRENT_TIMESTAMP
+    '''
+
+
+def upsert_embeddings(items, embeddings):
+    """
+    Insert or replace items (keyed by item['id']) with their embeddings
+
+    Args:
+        items: Item dicts without 'embedding' keys
+        embeddings: Matching embedding vectors
+    """
+    ensure_embeddings_table()
+    _run([(_upsert_query(), [_item_params(item, embedding) for item, embedding in zip(items, embeddings)])])
+
+
+def update_item_fields(items):
+    """
+    Refresh non-embedded fields (completed, created_date) without touching vectors
+
+    Args:
+        items: Item dicts whose embedding text is unchanged
+    """
+    ensure_embeddings_table()
+    _run([(
+        f'UPDATE {EMBEDDINGS_TABLE} SET completed = ?, created_date = ?, updated_at = CURRENT_TIMESTAMP WHERE item_id = ?',
+        [(None if item.get('completed') is None else bool(item['completed']), item.get('created_date'), item['id'])
+         for item in items]
+    )])
+
+
+def delete_embeddings(item_ids):
+    """Delete items by id ('task_12', 'note_3')"""
+    ensure_embeddings_table()
+    _run([(f'DELETE FROM {EMBEDDINGS_TABLE} WHERE item_id = ?', [(item_id,) for item_id in item_ids])])
+
+
+def replace_all_embeddings(items, embeddings):
+    """Replace the whole table in one transaction (full re-vectorization)"""
+    ensure_embeddings_table()
+    _run([
+        (f'DELETE FROM {EMBEDDINGS_TABLE}', None),
+        (_upsert_query(), [_item_params(item, embedding) for item, embedding in zip(items, embeddings)])
+    ])
+
+
+def count_embeddings():
+    """Number of stored items"""
+    ensure_embeddings_table()
+    return _run([(f'SELECT COUNT(*) AS c FROM {EMBEDDINGS_TABLE}', None)], fetch='all')[0]['c']
+
+
+def embeddings_signature():
+    """(row count, last update) - changes whenever items are added, edited or deleted"""
+    ensure_embeddings_table()
+    row = _run([(f'SELECT COUNT(*) AS c, MAX(updated_at) AS updated FROM {EMBEDDINGS_TABLE}', None)], fetch='all')[0]
+    return row['c'], str(row['updated'])
+
+
+def load_embedding_items():
+    """All stored items (without vectors) - used by sync to diff against the database"""
+    ensure_embeddings_table()
+    rows = _run([(f'SELECT {ITEM_COLUMNS} FROM {EMBEDDINGS_TABLE}', None)], fetch='all')
+    return [_row_to_item(row) for row in rows]
+
+
+def load_all_embeddings():
+    """
+    All stored items with vectors
+
+    Returns:
+        (items, embeddings matrix)
+    """
+    ensure_embeddings_table()
+    rows = _run([(f'SELECT {ITEM_COLUMNS}, embedding FROM {EMBEDDINGS_TABLE} ORDER BY item_id', None)], fetch='all')
+    items = [_row_to_item(row) for row in rows]
+    if not rows:
+        return items, np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+    return items, np.stack([_decode_vector(row['embedding']) for row in rows])
+
+
+def _filter_clause(filters):
+    """
+    search_memory filters -> (SQL WHERE clause, params), or None if nothing can match
+
+    The fuzzy category match runs in Python once per distinct category
+    name; the matching names are pushed into the query as an IN list.
+    """
+    from .vector_store import category_matches
+
+    conditions = []
+    params = []
+    filters = filters or {}
+
+    if filters.get('category'):
+        names = [
+            row['category']
+            for row in _run([(f'SELECT DISTINCT category FROM {EMBEDDINGS_TABLE}', None)], fetch='all')
+            if category_matches(filters['category'], row['category'])
+        ]
+        if not names:
+            return None
+        conditions.append(f"category IN ({', '.join('?' for _ in names)})")
+        params.extend(names)
+
+    if filters.get('type'):
+        conditions.append('item_type = ?')
+        params.append(filters['type'])
+
+    if filters.get('completed') is not None:
+        # Completed filter only constrains tasks; notes always pass
+        conditions.append("(item_type <> 'task' OR completed = ?)")
+        params.append(bool(filters['completed']))
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    return where, params
+
+
+def search_embeddings(query_embedding, n_results, filters=None):
+    """
+    Top-k items by cosine similarity, with filters applied in SQL
+
+    Args:
+        query_embedding: Query vector
+        n_results: Number of results
+        filters: Optional dict like {"category": "Wedding", "type": "task", "completed": False}
+
+    Returns:
+        List of (item, embedding, similarity), best first
+    """
+    ensure_embeddings_table()
+
+    clause = _filter_clause(filters)
+    if clause is None:
+        return []
+    where, params = clause
+
+    if get_db_type() == 'postgres':
+        # HNSW index serves ORDER BY distance LIMIT k
+        rows = _run([(f'''
+            SELECT {ITEM_COLUMNS}, embedding::text AS embedding,
+                   1 - (embedding <=> ?::vector) AS similarity
+            FROM {EMBEDDINGS_TABLE}
+            {where}
+            ORDER BY embedding <=> ?::vector
+            LIMIT ?
+        ''', (_encode_vector(query_embedding), *params, _encode_vector(query_embedding), n_results))], fetch='all')
+        return [(_row_to_item(row), _decode_vector(row['embedding']), float(row['similarity'])) for row in rows]
+
+    # SQLite: filtered rows come back from SQL, scoring is one in-process matvec
+    from .vector_store import top_k_similarities
+
+    rows = _run([(f'SELECT {ITEM_COLUMNS}, embedding FROM {EMBEDDINGS_TABLE} {where}', tuple(params))], fetch='all')
+    if not rows:
+        return []
+    matrix = np.stack([_decode_vector(row['embedding']) for row in rows])
+    top, scores = top_k_similarities(matrix, query_embedding, n_results)
+    return [(_row_to_item(rows[row]), matrix[row], float(score)) for row, score in zip(top, scores)]
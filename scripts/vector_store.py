@@ -1,69 +1,886 @@
 """
 Custom Vector Store for Life OS RAG
-Production-ready implementation using OpenAI Embeddings API + JSON storage
+Production-ready implementation using OpenAI Embeddings API (see embeddings.py) + binary storage
 Works with both SQLite (local dev) and PostgreSQL (production) via db_helper abstraction
+
+VECTOR_STORE_BACKEND=database keeps the embeddings in the database instead
+(see vector_db.py) so the bot and API services share one store across redeploys.
+
+On-disk format:
+- vector_store.npy:       contiguous float32 matrix (one row per item), memory-mapped on read
+- vector_store.meta.json: compact sidecar with store metadata and item fields (no embeddings)
+- vector_store.log:       append-only segment of upserts/deletes since the base was written,
+                          periodically compacted into the matrix
 """
 
 import os
 import json
+import time
+import re
+import base64
+import hashlib
+import threading
+from functools import lru_cache
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 import numpy as np
-from openai import OpenAI
 from .db_helper import execute_query
+from .embeddings import (
+    get_embedding,
+    get_embeddings,
+    get_query_embedding,
+    get_embedding_provider,
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS
+)
+from .ann_index import IVFIndex, ANN_ENABLED, ANN_MIN_ITEMS
+from .quantization import QuantizedMatrix, QUANTIZATION, QUANTIZED_DTYPES, RESCORE_FACTOR
+from .lexical_index import BM25Index, item_text
+from . import vector_db
+
+try:
+    import fcntl  # POSIX file locks (Render/Linux)
+except ImportError:
+    fcntl = None  # Windows local dev - single process, writes are not locked
+
+# 'file' (local binary store below) or 'database' (item_embeddings table via db_helper)
+VECTOR_STORE_BACKEND = os.getenv('VECTOR_STORE_BACKEND', 'file').lower()
+
+# search_memory ranking: 'vector' (embeddings), 'lexical' (BM25, no API call)
+# or 'hybrid' (reciprocal-rank fusion of both). Opt-in: lexical and hybrid
+# results can carry similarity=None, callers relying on a float similarity
+# should stay on 'vector'
+SEARCH_MODE = os.getenv('SEARCH_MODE', 'vector').lower()
+
+# Reciprocal-rank fusion constant (60 is the usual choice) and candidates
+# each ranker contributes per requested result
+RRF_K = 60
+FUSION_CANDIDATE_FACTOR = 4
 
 # Vector store stored in same directory as script (works on Render)
-VECTOR_STORE_PATH = Path(__file__).parent.parent / 'vector_store.json'
+VECTOR_STORE_DIR = Path(__file__).parent.parent
+EMBEDDINGS_PATH = VECTOR_STORE_DIR / 'vector_store.npy'
+METADATA_PATH = VECTOR_STORE_DIR / 'vector_store.meta.json'
+LOG_PATH = VECTOR_STORE_DIR / 'vector_store.log'
+LOCK_PATH = VECTOR_STORE_DIR / 'vector_store.lock'
+
+# Fold the append log into the base matrix once it grows past this size (~2 KB per item)
+COMPACT_LOG_BYTES = int(os.getenv('VECTOR_STORE_COMPACT_BYTES', 1024 * 1024))
+
+# Old pretty-printed JSON store - migrated once to the binary format on first use
+LEGACY_VECTOR_STORE_PATH = VECTOR_STORE_DIR / 'vector_store.json'
+
+# Process-wide resident copy of the store (one per gunicorn worker)
+# Reloaded when the base files' (mtime, size) change; log appends are read incrementally
+# log_offset is only meaningful for the log file it was read from (log_id)
+_store_cache = {'signature': None, 'log_id': None, 'log_offset': 0, 'store': None}
+_store_cache_lock = threading.Lock()
+
+def normalize_rows(matrix):
+    """
+    Scale each row to unit length so cosine similarity becomes a plain dot product
+    Zero rows are left as zeros (similarity 0 with everything).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
 
-# OpenAI API configuration
-# text-embedding-3-small: High quality, low cost ($0.02/1M tokens)
-# Using 384 dimensions to match previous all-MiniLM-L6-v2 model
 
-def get_embedding(text):
+def _write_store_files(metadata, items, embeddings):
+    """
+    Write a new base matrix + sidecar and start an empty append log
+    Caller must hold the store lock.
     """
-    Get embedding from OpenAI API
-    Uses text-embedding-3-small with 384 dimensions
+    matrix = normalize_rows(np.asarray(embeddings, dtype=np.float32).reshape(-1, EMBEDDING_DIMENSIONS))
+
+    if matrix.shape[0] != len(items):
+        raise ValueError(f"Row count mismatch: {matrix.shape[0]} embeddings for {len(items)} items")
+
+    # Generations must keep increasing across full rebuilds too - callers pass
+    # fresh metadata, and a reader holding an old log must never see its
+    # generation number reused for the new base
+    metadata = dict(metadata)
+    metadata['generation'] = max(metadata.get('generation', 0), _current_generation()) + 1
+    metadata['total_items'] = len(items)
+    metadata['dimensions'] = EMBEDDING_DIMENSIONS
+    metadata['dtype'] = 'float32'
+    metadata['normalized'] = True
+    metadata['updated_at'] = datetime.now().isoformat()
+
+    tmp_matrix = EMBEDDINGS_PATH.with_suffix('.npy.tmp')
+    with open(tmp_matrix, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_matrix, EMBEDDINGS_PATH)
+
+    tmp_meta = METADATA_PATH.with_suffix('.json.tmp')
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata, 'items': items}, f, separators=(',', ':'))
+    os.replace(tmp_meta, METADATA_PATH)
+
+    # Fresh log tagged with the new generation - records in the old log
+    # are either already in the new base or were replaced by it
+    _reset_log(metadata['generation'])
+
+    invalidate_vector_store_cache()
+
+
+def _current_generation():
+    """Highest generation on disk (sidecar or log header), 0 if there is no store"""
+    generation = 0
+    try:
+        with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+            generation = json.load(f)['metadata'].get('generation', 0)
+    except (OSError, ValueError, KeyError):
+        pass
+    try:
+        with open(LOG_PATH, 'rb') as f:
+            generation = max(generation, json.loads(f.readline()).get('generation', 0))
+    except (OSError, ValueError, AttributeError):
+        pass
+    return generation
+
+
+def _reset_log(generation):
+    """Replace the append log with an empty one for the given base generation"""
+    tmp_log = LOG_PATH.with_suffix('.log.tmp')
+    with open(tmp_log, 'wb') as f:
+        f.write(json.dumps({'generation': generation}).encode('utf-8') + b'\n')
+    os.replace(tmp_log, LOG_PATH)
+
+
+@contextmanager
+def _store_lock():
+    """
+    Exclusive cross-process lock for all store writers (API + bot workers)
+    Readers never take it - they rely on atomic replaces and line-complete log reads.
+    """
+    with open(LOCK_PATH, 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def save_vector_store(metadata, items, embeddings):
+    """
+    Write the vector store in binary format (full rewrite, clears the append log)
+
+    Rows are L2-normalized before writing, so search can score the
+    memory-mapped matrix directly. The matrix is written first and the
+    metadata sidecar last; readers detect a half-finished swap by the
+    row count check in load_vector_store().
 
     Args:
-        text: Text to embed
+        metadata: Store-level metadata dict (model, dimensions, ...)
+        items: List of item dicts WITHOUT 'embedding' keys
+        embeddings: Array-like of shape (len(items), EMBEDDING_DIMENSIONS)
+    """
+    with _store_lock():
+        _write_store_files(metadata, items, embeddings)
 
-    Returns:
-        List of floats (384 dimensions)
+
+def vector_store_exists():
+    """True if a binary vector store (or a legacy JSON store to migrate) is present"""
+    if VECTOR_STORE_BACKEND == 'database':
+        return vector_db.count_embeddings() > 0
+    if EMBEDDINGS_PATH.exists() and METADATA_PATH.exists():
+        return True
+    return LEGACY_VECTOR_STORE_PATH.exists()
+
+
+class OverlayMatrix:
     """
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        raise Exception("OPENAI_API_KEY environment variable not set")
+    Read-only base matrix (usually the memory-mapped .npy) plus the rows
+    replaced or appended since it was loaded
 
-    client = OpenAI(api_key=api_key)
+    slot[row] is -1 where the base row is current, otherwise the index of the
+    row's vector in `vectors`. Only the changed rows live on the heap - the
+    base is never copied. Supports len(), .shape, row indexing and
+    matrix @ query, like QuantizedMatrix. Never modified once built.
+    """
+
+    def __init__(self, base, slot, vectors):
+        self.base = base
+        self.slot = slot
+        self.vectors = vectors
+        self.changed = np.flatnonzero(slot >= 0)
+
+    @classmethod
+    def over(cls, matrix):
+        """Wrap a plain matrix (no-op for an OverlayMatrix)"""
+        if isinstance(matrix, cls):
+            return matrix
+        return cls(matrix, np.full(len(matrix), -1, dtype=np.int64),
+                   np.empty((0, matrix.shape[1]), dtype=np.float32))
+
+    @property
+    def shape(self):
+        return (len(self.slot), self.base.shape[1])
+
+    @property
+    def nbytes(self):
+        """Heap bytes held on top of the base"""
+        return self.slot.nbytes + self.vectors.nbytes
+
+    def __len__(self):
+        return len(self.slot)
+
+    def __getitem__(self, rows):
+        if isinstance(rows, (int, np.integer)):
+            slot = self.slot[rows]
+            return self.vectors[slot] if slot >= 0 else self.base[rows]
+
+        rows = np.arange(len(self.slot))[rows]
+        slots = self.slot[rows]
+        from_base = slots < 0
+        result = np.empty((len(rows), self.base.shape[1]), dtype=np.float32)
+        result[from_base] = self.base[rows[from_base]]
+        result[~from_base] = self.vectors[slots[~from_base]]
+        return result
+
+    def __array__(self, dtype=None, copy=None):
+        matrix = self[:]
+        return matrix if dtype is None else matrix.astype(dtype, copy=False)
+
+    def __matmul__(self, query):
+        """Dot product of every row with a query vector (base scored in place)"""
+        scores = np.empty(len(self.slot), dtype=np.float32)
+        scores[:len(self.base)] = self.base @ query
+        if len(self.changed):
+            scores[self.changed] = self.vectors[self.slot[self.changed]] @ query
+        return scores
+
+    def with_rows(self, rows, vectors):
+        """
+        Copy with rows set to new vectors
+
+        Args:
+            rows: Row numbers, existing (replaced) or len(self) onwards (appended)
+            vectors: (len(rows), D) float32 rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        grown = max(0, int(rows.max()) + 1 - len(self.slot)) if len(rows) else 0
+        slot = np.concatenate([self.slot, np.full(grown, -1, dtype=np.int64)])
+
+        # Rows already overlaid reuse their slot; the rest get new ones
+        reuse = slot[rows] >= 0
+        fresh = rows[~reuse]
+        slot[fresh] = np.arange(len(self.vectors), len(self.vectors) + len(fresh))
+        stacked = np.concatenate([self.vectors, np.empty((len(fresh), self.base.shape[1]), dtype=np.float32)])
+        stacked[slot[rows]] = vectors
+        return OverlayMatrix(self.base, slot, stacked)
+
+
+class ResidentStore:
+    """
+    In-memory view of the vector store for one process
+
+    items[row] and embeddings[row] describe the same item. id_to_row maps
+    each live item id to its row; rows of deleted items stay in place as
+    tombstones (alive[row] is False) until they are dropped. A published
+    store is never modified - apply() returns a new one - so searches
+    running in other threads always see a consistent snapshot.
+    """
+
+    # Drop tombstoned rows from memory once they make up this share of the matrix
+    TOMBSTONE_RATIO = 0.25
+
+    # Per-row type codes for the filter columns
+    TYPE_CODES = {'task': 0, 'note': 1}
+
+    def __init__(self, metadata, items, embeddings, alive=None, id_to_row=None):
+        self.metadata = metadata
+        self.items = items
+        self.embeddings = embeddings
+        self.alive = np.ones(len(items), dtype=bool) if alive is None else alive
+
+        if id_to_row is None:
+            id_to_row = {}
+            for row, item in enumerate(items):
+                if not self.alive[row]:
+                    continue
+                previous = id_to_row.get(item['id'])
+                if previous is not None:
+                    # Older stores appended a duplicate on every update - newest row wins
+                    self.alive[previous] = False
+                id_to_row[item['id']] = row
+        self.id_to_row = id_to_row
+        self._filter_columns = None
+        self._filter_columns_lock = threading.Lock()
+        self._ann_index = None
+        self._ann_lock = threading.Lock()
+        self._quantized = None
+        self._quantized_lock = threading.Lock()
+        self._lexical = None
+        self._lexical_lock = threading.Lock()
+
+    @property
+    def live_count(self):
+        """Number of live (non-deleted) items"""
+        return len(self.id_to_row)
+
+    @property
+    def has_tombstones(self):
+        """True if some rows belong to deleted or replaced items"""
+        return self.live_count < len(self.items)
+
+    def live_items(self):
+        """Live items in row order"""
+        return [self.items[row] for row in sorted(self.id_to_row.values())]
+
+    def get(self, item_id):
+        """(item, embedding) for a live id, or None"""
+        row = self.id_to_row.get(item_id)
+        if row is None:
+            return None
+        return self.items[row], self.embeddings[row]
+
+    def filter_columns(self):
+        """
+        Per-row filter columns, built once per snapshot
+
+        Returns:
+            Dict with 'type' (int8 codes, -1 unknown), 'completed' (int8:
+            -1 missing, 0, 1), 'category' (int32 index into 'category_names')
+            and 'category_names' (distinct names)
+        """
+        with self._filter_columns_lock:
+            if self._filter_columns is None:
+                category_index = {}
+                type_codes = np.empty(len(self.items), dtype=np.int8)
+                completed = np.empty(len(self.items), dtype=np.int8)
+                categories = np.empty(len(self.items), dtype=np.int32)
+
+                for row, item in enumerate(self.items):
+                    type_codes[row] = self.TYPE_CODES.get(item['type'], -1)
+                    value = item.get('completed')
+                    completed[row] = -1 if value is None else int(bool(value))
+                    categories[row] = category_index.setdefault(item['category'], len(category_index))
+
+                self._filter_columns = {
+                    'type': type_codes,
+                    'completed': completed,
+                    'category': categories,
+                    'category_names': list(category_index)
+                }
+            return self._filter_columns
+
+    def ann_index(self):
+        """
+        IVF index over this snapshot, or None if the store is searched exactly
+
+        Built on first use once the store reaches ANN_MIN_ITEMS live items;
+        snapshots derived through apply() update it incrementally instead of
+        retraining.
+        """
+        if not ANN_ENABLED or self.live_count < ANN_MIN_ITEMS:
+            return None
+        with self._ann_lock:
+            if self._ann_index is None:
+                started = time.time()
+                self._ann_index = IVFIndex.build(self.embeddings)
+                print(f"[Vector Store] Built ANN index: {len(self._ann_index.lists)} partitions over {len(self.items)} rows ({time.time() - started:.1f}s)")
+            return self._ann_index
+
+    def search_matrix(self):
+        """
+        Matrix scored by search_memory: the float32 embeddings, or a resident
+        float16/int8 copy when VECTOR_STORE_QUANTIZATION is set
+
+        The quantized copy is built once per loaded base; apply() only
+        re-quantizes the rows it touches.
+        """
+        if QUANTIZATION not in QUANTIZED_DTYPES:
+            return self.embeddings
+        with self._quantized_lock:
+            if self._quantized is None:
+                matrix = self.embeddings
+                if isinstance(matrix, OverlayMatrix):
+                    # Quantize the base in place, then only the overlaid rows
+                    self._quantized = QuantizedMatrix.from_float(matrix.base, QUANTIZATION).with_rows(matrix.changed, matrix)
+                else:
+                    self._quantized = QuantizedMatrix.from_float(matrix, QUANTIZATION)
+                print(f"[Vector Store] Quantized {len(self.items)} rows to {QUANTIZATION} ({self._quantized.nbytes / 1024 / 1024:.1f} MB)")
+            return self._quantized
+
+    def lexical_index(self):
+        """BM25 index over live rows, built on first use (apply() updates it incrementally)"""
+        with self._lexical_lock:
+            if self._lexical is None:
+                self._lexical = BM25Index.build([
+                    item_text(item) if self.alive[row] else None
+                    for row, item in enumerate(self.items)
+                ])
+            return self._lexical
+
+    def filter_mask(self, filters):
+        """
+        Boolean row mask for search_memory filters, evaluated column-wise
+
+        The fuzzy category match runs once per distinct category name, not
+        once per item.
+
+        Args:
+            filters: Dict like {"category": "Wedding", "type": "task", "completed": False}
+
+        Returns:
+            Boolean array of length len(items) (tombstones not applied)
+        """
+        columns = self.filter_columns()
+        mask = np.ones(len(self.items), dtype=bool)
+
+        if filters.get('category'):
+            allowed = np.fromiter(
+                (category_matches(filters['category'], name) for name in columns['category_names']),
+                dtype=bool,
+                count=len(columns['category_names'])
+            )
+            mask &= allowed[columns['category']]
+
+        if filters.get('type'):
+            mask &= columns['type'] == self.TYPE_CODES.get(filters['type'], -2)
+
+        if filters.get('completed') is not None:
+            # Completed filter only constrains tasks; notes always pass
+            is_task = columns['type'] == self.TYPE_CODES['task']
+            mask &= ~is_task | (columns['completed'] == int(bool(filters['completed'])))
+
+        return mask
+
+    def apply(self, records):
+        """
+        Return a new store with log records applied
+
+        Upserts of an existing id overwrite its row in place; new ids are
+        appended; deletes tombstone the row.
+
+        Args:
+            records: Dicts from _read_log() - {'op': 'upsert', 'item', 'vector'}
+                     or {'op': 'delete', 'id'}
+        """
+        if not records:
+            return self
+
+        base_rows = len(self.items)
+        items = list(self.items)
+        id_to_row = dict(self.id_to_row)
+        replaced = {}  # base row -> new vector
+        appended = []  # vectors for rows added after base_rows
+        dead = []
+
+        for record in records:
+            if record['op'] == 'delete':
+                row = id_to_row.pop(record['id'], None)
+                if row is not None:
+                    dead.append(row)
+                continue
+
+            item = record['item']
+            row = id_to_row.get(item['id'])
+            if row is None:
+                id_to_row[item['id']] = len(items)
+                items.append(item)
+                appended.append(record['vector'])
+            else:
+                items[row] = item
+                if row < base_rows:
+                    replaced[row] = record['vector']
+                else:
+                    appended[row - base_rows] = record['vector']
+
+        # Changed rows go into an overlay - the (memory-mapped) base matrix
+        # is never copied to the heap
+        changed_rows = list(replaced) + list(range(base_rows, len(items)))
+        embeddings = self.embeddings
+        if changed_rows:
+            embeddings = OverlayMatrix.over(embeddings).with_rows(
+                changed_rows,
+                normalize_rows(np.stack(list(replaced.values()) + appended))
+            )
+
+        alive = np.concatenate([self.alive, np.ones(len(appended), dtype=bool)])
+        alive[dead] = False
+
+        store = ResidentStore(self.metadata, items, embeddings, alive, id_to_row)
+
+        # Derived structures are updated for the touched rows only
+        touched = changed_rows
+        if self._ann_index is not None:
+            store._ann_index = self._ann_index.with_rows(touched, embeddings)
+        if self._quantized is not None:
+            store._quantized = self._quantized.with_rows(touched, embeddings)
+        if self._lexical is not None:
+            changes = [
+                (
+                    row,
+                    item_text(self.items[row]) if row < base_rows and self.alive[row] else None,
+                    item_text(items[row]) if alive[row] else None
+                )
+                for row in sorted(set(touched) | set(dead))
+            ]
+            store._lexical = self._lexical.with_rows(changes, len(items))
+        if store.has_tombstones and (len(items) - store.live_count) >= len(items) * self.TOMBSTONE_RATIO:
+            store = store.without_tombstones()
+        return store
+
+    def without_tombstones(self):
+        """Copy of the store holding only live rows (scan cost proportional to live data)"""
+        if not self.has_tombstones:
+            return self
+        metadata, items, embeddings = self.live_view()
+        store = ResidentStore(metadata, items, embeddings)
+        rows = sorted(self.id_to_row.values())
+        if self._ann_index is not None:
+            new_row_of = np.full(len(self.items), -1, dtype=np.int64)
+            new_row_of[rows] = np.arange(self.live_count)
+            store._ann_index = self._ann_index.remapped(new_row_of)
+        if self._quantized is not None:
+            store._quantized = self._quantized[rows]
+        # The BM25 index is rebuilt lazily - row numbers changed
+        return store
+
+    def live_view(self):
+        """(metadata, items, embeddings) with only live rows, in row order"""
+        if not self.has_tombstones:
+            return self.metadata, self.items, self.embeddings
+        rows = sorted(self.id_to_row.values())
+        return self.metadata, [self.items[row] for row in rows], self.embeddings[rows]
+
+
+def _read_log(offset=0, log_id=None):
+    """
+    Read complete records from the append log starting at a byte offset
+
+    A trailing partial line (a writer mid-append) is left for the next read.
+
+    Args:
+        offset: Byte offset to start from
+        log_id: Identity (inode) of the log file the offset belongs to -
+                if the log has been replaced since, nothing is read
+
+    Returns:
+        (generation, records, new_offset, log_id) - generation is only
+        known when reading from offset 0, otherwise None. log_id is the
+        identity of the file actually read (None if there is no log).
+    """
+    generation = None
+    records = []
 
     try:
-        response = client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text,
-            dimensions=384  # Match old model dimensions for compatibility
+        f = open(LOG_PATH, 'rb')
+    except FileNotFoundError:
+        return generation, records, offset, None
+
+    with f:
+        current_id = os.fstat(f.fileno()).st_ino
+        if log_id is not None and current_id != log_id:
+            # Log was reset for a new base - the old offset means nothing here
+            return generation, records, offset, current_id
+        f.seek(offset)
+        data = f.read()
+
+    end = data.rfind(b'\n') + 1
+    for line in data[:end].splitlines():
+        record = json.loads(line)
+        if 'generation' in record:
+            generation = record['generation']
+        elif record.get('op') == 'delete':
+            records.append({'op': 'delete', 'id': record['id']})
+        else:
+            records.append({
+                'op': 'upsert',
+                'item': record['item'],
+                'vector': np.frombuffer(base64.b64decode(record['embedding']), dtype=np.float32)
+            })
+
+    return generation, records, offset + end, current_id
+
+
+def load_vector_store():
+    """
+    Load the vector store without decoding embeddings
+
+    Migrates the legacy JSON store on first use if no binary store exists.
+    Records in the append log are replayed on top of the base matrix.
+
+    Returns:
+        (metadata, items, embeddings) with live items only, where embeddings
+        is a float32 matrix of unit-length rows aligned with items
+        (memory-mapped when the log is empty)
+    """
+    store, _ = _load_store_with_offset()
+    return store.live_view()
+
+
+def _load_store_with_offset():
+    """
+    Load a ResidentStore from disk plus the log position that was consumed
+
+    Returns:
+        (store, (log_id, log_offset))
+    """
+    if not (EMBEDDINGS_PATH.exists() and METADATA_PATH.exists()):
+        if not LEGACY_VECTOR_STORE_PATH.exists():
+            raise Exception("Vector store not found. Run vectorize_all_data() first.")
+        migrate_legacy_store()
+
+    with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+        sidecar = json.load(f)
+
+    metadata = sidecar['metadata']
+    items = sidecar['items']
+    embeddings = np.load(EMBEDDINGS_PATH, mmap_mode='r')
+
+    if embeddings.shape[0] != len(items):
+        raise Exception(
+            f"Vector store is inconsistent: {embeddings.shape[0]} embeddings for {len(items)} items. "
+            "Re-run vectorize_all_data(force=True)."
         )
-        return response.data[0].embedding
-    except Exception as e:
-        print(f"[Vector Store] Error getting embedding from OpenAI: {e}")
-        raise
 
+    # Stores written before rows were normalized on save: normalize in memory
+    if not metadata.get('normalized'):
+        embeddings = normalize_rows(embeddings)
 
-def vectorize_all_data(force=False):
+    log_generation, records, offset, log_id = _read_log()
+
+    if log_generation is not None and log_generation != metadata.get('generation', 0):
+        if log_generation > metadata.get('generation', 0):
+            # Log belongs to a base we have not seen yet (mid-compaction)
+            raise Exception("Vector store is being compacted, retry")
+        # Stale log from before the current base was written - already merged
+        records = []
+
+    return ResidentStore(metadata, items, embeddings).apply(records), (log_id, offset)
+
+
+def _store_signature():
+    """(mtime, size) of the base files - changes whenever any process rewrites them"""
+    signature = []
+    for path in (EMBEDDINGS_PATH, METADATA_PATH):
+        stat = path.stat()
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def _log_size():
+    """Current append log size in bytes (0 if there is no log)"""
+    return _log_state()[1]
+
+
+def _log_state():
+    """(identity, size) of the append log - (None, 0) if there is none"""
+    try:
+        stat = LOG_PATH.stat()
+    except FileNotFoundError:
+        return None, 0
+    return stat.st_ino, stat.st_size
+
+
+def invalidate_vector_store_cache():
+    """Drop this process's cached store so the next read reloads from disk"""
+    with _store_cache_lock:
+        _store_cache['signature'] = None
+        _store_cache['log_id'] = None
+        _store_cache['log_offset'] = 0
+        _store_cache['store'] = None
+
+
+def get_vector_store():
     """
-    Vectorize all tasks and notes in the database
-    Works with both SQLite and PostgreSQL via db_helper
+    Resident ResidentStore for the current process
+
+    The first call in each worker loads the store; later calls only stat
+    the store files. New append-log records written by other processes
+    are read incrementally from the last offset; a rewritten base
+    (vectorize or compaction) triggers a full reload. The returned store
+    is a read-only snapshot.
+
+    Returns:
+        ResidentStore
+    """
+    if not (EMBEDDINGS_PATH.exists() and METADATA_PATH.exists()):
+        # Nothing to cache yet (load_vector_store migrates or raises)
+        load_vector_store()
+
+    with _store_cache_lock:
+        for attempt in range(3):
+            signature = _store_signature()
+            cached = _store_cache['store']
+
+            # The cached offset only applies to the same log file - a reader
+            # that loaded between a base rewrite and its log reset holds the
+            # old log's offset, so a replaced log means a full reload
+            log_id, log_size = _log_state()
+            if (cached is not None and _store_cache['signature'] == signature
+                    and log_id == _store_cache['log_id']):
+                if log_size == _store_cache['log_offset']:
+                    return cached
+
+                if log_size > _store_cache['log_offset']:
+                    # Same base, log only grew: replay just the new tail
+                    _, records, offset, read_id = _read_log(_store_cache['log_offset'], log_id)
+                    if read_id == log_id:
+                        store = cached.apply(records)
+                        _store_cache['log_offset'] = offset
+                        _store_cache['store'] = store
+                        return store
+
+            try:
+                store, (log_id, offset) = _load_store_with_offset()
+            except Exception:
+                # A writer may be between replacing the matrix, sidecar and log
+                if attempt == 2:
+                    raise
+                time.sleep(0.05)
+                continue
+
+            # Only trust the load if no writer replaced the base while reading
+            if _store_signature() == signature:
+                _store_cache['signature'] = signature
+                _store_cache['log_id'] = log_id
+                _store_cache['log_offset'] = offset
+                _store_cache['store'] = store
+                print(f"[Vector Store] Loaded {store.live_count} items into memory (generation {store.metadata.get('generation', 0)})")
+            return store
+
+
+def _append_log_record(record):
+    """
+    Append one record to the log segment - O(1) I/O regardless of store size
+
+    Writers serialize on the store lock, so concurrent writes from the API
+    and bot processes never overwrite each other. Once the log grows past
+    COMPACT_LOG_BYTES it is folded into the base matrix.
+    """
+    line = json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    with _store_lock():
+        if not LOG_PATH.exists():
+            # Store written before the append log existed
+            with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+                _reset_log(json.load(f)['metadata'].get('generation', 0))
+
+        with open(LOG_PATH, 'ab') as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if _log_size() >= COMPACT_LOG_BYTES:
+            _compact_locked()
+
+
+def upsert_vector_item(item, embedding):
+    """
+    Insert an item, or replace the stored item with the same id
 
     Args:
-        force: If True, re-vectorize even if vector store exists
+        item: Item dict WITHOUT an 'embedding' key (item['id'] is the key)
+        embedding: Embedding vector (list or array)
     """
+    if VECTOR_STORE_BACKEND == 'database':
+        vector_db.upsert_embeddings([item], [embedding])
+        return
+
+    vector = normalize_rows(np.asarray(embedding, dtype=np.float32).reshape(EMBEDDING_DIMENSIONS))
+    _append_log_record({
+        'op': 'upsert',
+        'item': item,
+        'embedding': base64.b64encode(vector.tobytes()).decode('ascii')
+    })
+
 
-    if VECTOR_STORE_PATH.exists() and not force:
-        print(f"[OK] Vector store already exists at {VECTOR_STORE_PATH}")
-        print("[OK] Use force=True to re-vectorize")
+def remove_from_vector_store(item_id, item_type):
+    """
+    Delete a task/note from the vector store (tombstoned until compaction)
+    Called when tasks/notes are deleted from database
+
+    Args:
+        item_id: Database id of the task/note
+        item_type: 'task' or 'note'
+    """
+    if VECTOR_STORE_BACKEND == 'database':
+        vector_db.delete_embeddings([f"{item_type}_{item_id}"])
+    elif EMBEDDINGS_PATH.exists() and METADATA_PATH.exists():
+        _append_log_record({'op': 'delete', 'id': f"{item_type}_{item_id}"})
+    else:
         return
+    print(f"[Vector Store] Removed {item_type}_{item_id} from vector store")
 
-    print("[Vector Store] Starting vectorization...")
 
+def compact_vector_store():
+    """Fold the append log into the base matrix and start a new empty log"""
+    with _store_lock():
+        _compact_locked()
+
+
+def _compact_locked():
+    """compact_vector_store() body - caller must hold the store lock"""
+    store, _ = _load_store_with_offset()
+    metadata, items, embeddings = store.live_view()
+    _write_store_files(metadata, items, embeddings)
+    print(f"[Vector Store] Compacted append log ({len(items)} items)")
+
+
+def migrate_legacy_store(json_path=None):
+    """
+    One-shot migration from the old vector_store.json to the binary format
+    The JSON file is left in place as a backup.
+
+    Args:
+        json_path: Path to the legacy JSON vector store (defaults to LEGACY_VECTOR_STORE_PATH)
+    """
+    json_path = Path(json_path or LEGACY_VECTOR_STORE_PATH)
+    print(f"[Vector Store] Migrating {json_path.name} to binary format...")
+
+    with open(json_path, 'r', encoding='utf-8') as f:
+        legacy = json.load(f)
+
+    items = []
+    embeddings = np.empty((len(legacy['items']), EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+    for row, item in enumerate(legacy['items']):
+        embeddings[row] = item['embedding']
+        items.append({key: value for key, value in item.items() if key != 'embedding'})
+
+    metadata = dict(legacy.get('metadata', {}))
+    metadata['migrated_from'] = json_path.name
+    save_vector_store(metadata, items, embeddings)
+
+    old_mb = json_path.stat().st_size / (1024 * 1024)
+    new_mb = (EMBEDDINGS_PATH.stat().st_size + METADATA_PATH.stat().st_size) / (1024 * 1024)
+    print(f"[OK] Migrated {len(items)} items ({old_mb:.2f} MB JSON -> {new_mb:.2f} MB binary)")
+
+
+def build_embedding_text(item_type, category, content, due_date=None):
+    """Text that gets embedded for a task/note - category prefix plus due date for tasks"""
+    embedding_text = f"{category}: {content}"
+    if item_type == 'task' and due_date:
+        embedding_text += f" (due: {due_date})"
+    return embedding_text
+
+
+def item_fingerprint(item):
+    """
+    Hash of everything that feeds the embedding (type, category, content, due date)
+    Two items with the same fingerprint share the same embedding.
+    """
+    text = build_embedding_text(item['type'], item['category'], item['content'], item.get('due_date'))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def load_database_items():
+    """
+    Read all tasks and notes as vector store items (without embeddings)
+    Works with both SQLite and PostgreSQL via db_helper
+
+    Returns:
+        (items, task_count, note_count)
+    """
     # Get all tasks using db_helper (works with SQLite and PostgreSQL)
     tasks = execute_query('''
         SELECT t.id, c.name, t.content, t.due_date, t.created_date, t.completed
@@ -78,84 +895,245 @@ def vectorize_all_data(force=False):
         JOIN categories c ON n.category_id = c.id
     ''', fetch='all')
 
-    # Build vector store
-    vector_store = {
-        'metadata': {
-            'created_at': datetime.now().isoformat(),
-            'model': 'text-embedding-3-small',
-            'provider': 'openai',
-            'dimensions': 384,
-            'total_items': len(tasks) + len(notes)
-        },
-        'items': []
-    }
+    items = []
 
-    # Vectorize tasks
     for task in tasks:
-        task_id = task['id']
-        category = task['name']  # Column alias from JOIN
-        content = task['content']
-        due_date = task['due_date']
-        created = task['created_date']
-        completed = task['completed']
-
-        # Create rich text for better embeddings
-        embedding_text = f"{category}: {content}"
-        if due_date:
-            embedding_text += f" (due: {due_date})"
-
-        # Generate embedding via OpenAI API
-        embedding = get_embedding(embedding_text)
-
-        vector_store['items'].append({
-            'id': f"task_{task_id}",
+        items.append({
+            'id': f"task_{task['id']}",
             'type': 'task',
-            'category': category,
-            'content': content,
-            'due_date': str(due_date) if due_date else None,
-            'created_date': str(created),
-            'completed': bool(completed),
-            'embedding': embedding
+            'category': task['name'],  # Column alias from JOIN
+            'content': task['content'],
+            'due_date': str(task['due_date']) if task['due_date'] else None,
+            'created_date': str(task['created_date']),
+            'completed': bool(task['completed'])
         })
 
-    print(f"[OK] Vectorized {len(tasks)} tasks")
-
-    # Vectorize notes
     for note in notes:
-        note_id = note['id']
-        category = note['name']  # Column alias from JOIN
-        content = note['content']
-        created = note['created_date']
+        items.append({
+            'id': f"note_{note['id']}",
+            'type': 'note',
+            'category': note['name'],  # Column alias from JOIN
+            'content': note['content'],
+            'created_date': str(note['created_date'])
+        })
 
-        # Create rich text for better embeddings
-        embedding_text = f"{category}: {content}"
+    return items, len(tasks), len(notes)
 
-        # Generate embedding via OpenAI API
-        embedding = get_embedding(embedding_text)
 
-        vector_store['items'].append({
-            'id': f"note_{note_id}",
-            'type': 'note',
-            'category': category,
-            'content': content,
-            'created_date': str(created),
-            'embedding': embedding
-        })
+def vectorize_all_data(force=False):
+    """
+    Vectorize all tasks and notes in the database
+    Works with both SQLite and PostgreSQL via db_helper
+
+    Args:
+        force: If True, re-vectorize even if vector store exists
+    """
+
+    if VECTOR_STORE_BACKEND == 'database':
+        if not force and vector_store_exists():
+            print(f"[OK] Vector store already exists in the {vector_db.EMBEDDINGS_TABLE} table")
+            print("[OK] Use force=True to re-vectorize, or sync_vector_store() to embed only changes")
+            return
+    elif EMBEDDINGS_PATH.exists() and METADATA_PATH.exists() and not force:
+        print(f"[OK] Vector store already exists at {EMBEDDINGS_PATH}")
+        print("[OK] Use force=True to re-vectorize, or sync_vector_store() to embed only changes")
+        return
+
+    print("[Vector Store] Starting vectorization...")
+
+    items, task_count, note_count = load_database_items()
 
-    print(f"[OK] Vectorized {len(notes)} notes")
+    # Build vector store
+    metadata = {
+        'created_at': datetime.now().isoformat(),
+        'model': EMBEDDING_MODEL,
+        'provider': get_embedding_provider(),
+        'dimensions': EMBEDDING_DIMENSIONS,
+        'total_items': len(items)
+    }
 
-    # Save to JSON file
-    with open(VECTOR_STORE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(vector_store, f, indent=2)
+    # Generate all embeddings in batched, concurrent requests
+    embedding_texts = [
+        build_embedding_text(item['type'], item['category'], item['content'], item.get('due_date'))
+        for item in items
+    ]
+    embeddings = get_embeddings(embedding_texts, progress=True)
 
-    print(f"[OK] Vector store saved to {VECTOR_STORE_PATH}")
-    print(f"[OK] Total items: {len(vector_store['items'])}")
+    print(f"[OK] Vectorized {task_count} tasks")
+    print(f"[OK] Vectorized {note_count} notes")
+
+    if VECTOR_STORE_BACKEND == 'database':
+        vector_db.replace_all_embeddings(items, embeddings)
+        print(f"[OK] Vector store saved to the {vector_db.EMBEDDINGS_TABLE} table ({len(items)} items)")
+        return
+
+    # Save matrix + metadata sidecar
+    save_vector_store(metadata, items, embeddings)
+
+    print(f"[OK] Vector store saved to {EMBEDDINGS_PATH}")
+    print(f"[OK] Total items: {len(items)}")
 
     # Print file size
-    file_size_mb = VECTOR_STORE_PATH.stat().st_size / (1024 * 1024)
+    file_size_mb = (EMBEDDINGS_PATH.stat().st_size + METADATA_PATH.stat().st_size) / (1024 * 1024)
     print(f"[OK] File size: {file_size_mb:.2f} MB")
 
 
+def sync_vector_store():
+    """
+    Bring the vector store in line with the database, embedding only what changed
+
+    Rows are matched by id ('task_12') and compared by item_fingerprint():
+    new or edited rows are embedded, unchanged rows keep their stored vector
+    (metadata such as 'completed' is refreshed), and rows deleted from the
+    database are dropped. Cheap enough to run nightly.
+
+    Returns:
+        Dict with counts: added, updated, unchanged, removed
+    """
+    if not vector_store_exists():
+        print("[Vector Store] No vector store yet - running full vectorization")
+        vectorize_all_data()
+        if VECTOR_STORE_BACKEND == 'database':
+            return {'added': vector_db.count_embeddings(), 'updated': 0, 'unchanged': 0, 'removed': 0}
+        return {'added': load_vector_store()[0]['total_items'], 'updated': 0, 'unchanged': 0, 'removed': 0}
+
+    print("[Vector Store] Syncing with database...")
+
+    if VECTOR_STORE_BACKEND == 'database':
+        return _sync_database_store()
+
+    snapshot_items = get_vector_store().live_items()
+    snapshot_by_id = {item['id']: item for item in snapshot_items}
+    snapshot_ids = set(snapshot_by_id)
+    stored_fingerprints = {item['id']: item_fingerprint(item) for item in snapshot_items}
+
+    db_items, _, _ = load_database_items()
+    db_ids = {item['id'] for item in db_items}
+
+    # Embed new and changed rows before taking the write lock (network time)
+    to_embed = [item for item in db_items if stored_fingerprints.get(item['id']) != item_fingerprint(item)]
+    summary = {
+        'added': sum(1 for item in to_embed if item['id'] not in snapshot_ids),
+        'updated': sum(1 for item in to_embed if item['id'] in snapshot_ids),
+        'unchanged': len(db_items) - len(to_embed),
+        'removed': len(snapshot_ids - db_ids)
+    }
+
+    # Nothing to embed, drop or refresh ('completed' etc.): rewriting the
+    # base would only make every worker reload the same store
+    if not to_embed and not summary['removed'] and all(snapshot_by_id[item['id']] == item for item in db_items):
+        print(f"[OK] Sync complete: vector store already up to date ({len(db_items)} items)")
+        return summary
+
+    fresh_by_id = _embed_items(to_embed)
+
+    kept = 0
+    while True:
+        with _store_lock():
+            # Re-read under the lock so appends made while we were embedding are kept
+            current, _ = _load_store_with_offset()
+            current_rows = current.id_to_row
+
+            # Store was rebuilt by another process while we were embedding -
+            # embed the rows it lacks outside the lock, then try again
+            missing = [item for item in db_items if item['id'] not in fresh_by_id and item['id'] not in current_rows]
+            if not missing:
+                items = []
+                rows = []
+                for item in db_items:
+                    items.append(item)
+                    if item['id'] in fresh_by_id:
+                        rows.append(np.asarray(fresh_by_id[item['id']], dtype=np.float32))
+                    else:
+                        rows.append(current.embeddings[current_rows[item['id']]])
+
+                # Items appended after our database read aren't in db_items yet - keep them
+                for item_id, row in current_rows.items():
+                    if item_id not in db_ids and item_id not in snapshot_ids:
+                        items.append(current.items[row])
+                        rows.append(current.embeddings[row])
+                        kept += 1
+
+                embeddings = np.stack(rows) if rows else np.empty((0, EMBEDDING_DIMENSIONS), dtype=np.float32)
+                _write_store_files(current.metadata, items, embeddings)
+                break
+
+        fresh_by_id.update(_embed_items(missing))
+
+    print(f"[OK] Sync complete: {summary['added']} added, {summary['updated']} updated, "
+          f"{summary['unchanged']} unchanged, {summary['removed']} removed")
+    if kept:
+        print(f"[OK] Kept {kept} items added during the sync")
+
+    return summary
+
+
+def _embed_items(items):
+    """Embed vector store items in batched requests: {item id: embedding}"""
+    embeddings = get_embeddings(
+        [build_embedding_text(item['type'], item['category'], item['content'], item.get('due_date'))
+         for item in items],
+        progress=bool(items)
+    )
+    return {item['id']: embedding for item, embedding in zip(items, embeddings)}
+
+
+def _sync_database_store():
+    """
+    sync_vector_store() for the database backend
+
+    No store lock needed: each write is its own transaction, and only ids
+    read before the database snapshot are ever deleted, so items added by
+    other processes during the sync are kept.
+    """
+    stored_items = {item['id']: item for item in vector_db.load_embedding_items()}
+
+    db_items, _, _ = load_database_items()
+    db_ids = {item['id'] for item in db_items}
+
+    to_embed = []
+    refreshed = []
+    for item in db_items:
+        stored = stored_items.get(item['id'])
+        if stored is None or item_fingerprint(stored) != item_fingerprint(item):
+            to_embed.append(item)
+        elif (stored.get('completed'), stored.get('created_date')) != (item.get('completed'), item.get('created_date')):
+            refreshed.append(item)
+
+    fresh = get_embeddings(
+        [build_embedding_text(item['type'], item['category'], item['content'], item.get('due_date'))
+         for item in to_embed],
+        progress=bool(to_embed)
+    )
+    removed = [item_id for item_id in stored_items if item_id not in db_ids]
+
+    vector_db.upsert_embeddings(to_embed, fresh)
+    vector_db.update_item_fields(refreshed)
+    vector_db.delete_embeddings(removed)
+
+    summary = {
+        'added': sum(1 for item in to_embed if item['id'] not in stored_items),
+        'updated': sum(1 for item in to_embed if item['id'] in stored_items),
+        'unchanged': len(db_items) - len(to_embed),
+        'removed': len(removed)
+    }
+
+    print(f"[OK] Sync complete: {summary['added']} added, {summary['updated']} updated, "
+          f"{summary['unchanged']} unchanged, {summary['removed']} removed")
+
+    return summary
+
+
+def migrate_to_database():
+    """Copy the local file store into the item_embeddings table (no re-embedding)"""
+    if not (EMBEDDINGS_PATH.exists() and METADATA_PATH.exists()):
+        migrate_legacy_store()
+
+    _, items, embeddings = load_vector_store()
+    vector_db.upsert_embeddings(items, embeddings)
+    print(f"[OK] Copied {len(items)} items into the {vector_db.EMBEDDINGS_TABLE} table")
+
+
 def cosine_similarity(vec1, vec2):
     """Calculate cosine similarity between two vectors"""
     vec1 = np.array(vec1)
@@ -171,6 +1149,47 @@ def cosine_similarity(vec1, vec2):
     return dot_product / (norm1 * norm2)
 
 
+def top_k_similarities(embeddings, query_embedding, k, mask=None):
+    """
+    Score every row with one matrix-vector product and pick the top k
+
+    Args:
+        embeddings: (N, D) matrix of unit-length rows (or a QuantizedMatrix)
+        query_embedding: Query vector of length D (normalized here)
+        k: Number of results wanted
+        mask: Optional boolean array of length N - False rows are never returned
+
+    Returns:
+        (rows, scores) numpy arrays, best match first
+    """
+    if k <= 0 or len(embeddings) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    query = normalize_rows(query_embedding)
+    scores = embeddings @ query
+
+    if mask is not None:
+        candidates = np.flatnonzero(mask)
+        scores = scores[candidates]
+    else:
+        candidates = None
+
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    # argpartition is O(N); only the k winners get fully sorted
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind='stable')]
+
+    rows = candidates[top] if candidates is not None else top
+    return rows, scores[top]
+
+
+@lru_cache(maxsize=4096)
 def category_matches(filter_category, item_category):
     """
     Flexible category matching with word-level comparison
@@ -186,7 +1205,7 @@ def category_matches(filter_category, item_category):
         item_category: Category name from vector store item
 
     Returns:
-        True if categories match, False otherwise
+        True if categories match, False otherwise (memoized per name pair)
     """
     filter_lower = filter_category.lower()
     item_lower = item_category.lower()
@@ -197,7 +1216,6 @@ def category_matches(filter_category, item_category):
 
     # Strategy 2: Word-level matching (handles separators and word boundaries)
     # Extract words from both (removing separators like " - ", "/", etc.)
-    import re
     filter_words = re.findall(r'\w+', filter_lower)
     item_words = re.findall(r'\w+', item_lower)
 
@@ -226,7 +1244,102 @@ def category_matches(filter_category, item_category):
     return True
 
 
-def search_memory(query, n_results=5, filters=None):
+def _search_mask(store, filters):
+    """
+    Row mask for a search: tombstones are never returned, filters are
+    evaluated column-wise. None if every row is eligible.
+    """
+    mask = store.alive if store.has_tombstones else None
+    if filters:
+        filter_mask = store.filter_mask(filters)
+        mask = filter_mask if mask is None else (mask & filter_mask)
+    return mask
+
+
+def _vector_hits(store, query_vector, k, mask):
+    """Top-k rows of the resident store by cosine similarity"""
+    embeddings = store.embeddings
+
+    # Quantized stores score the compact int8/float16 copy and rescore a
+    # wider candidate set against the exact float32 rows
+    matrix = store.search_matrix()
+    rescore = matrix is not embeddings and RESCORE_FACTOR > 0
+    n_candidates = k * RESCORE_FACTOR if rescore else k
+
+    # Large stores: approximate search over the nearest IVF partitions,
+    # exact scan if the probed partitions hold too few matching rows
+    rows = None
+    ann = store.ann_index()
+    if ann is not None:
+        rows, scores = ann.search(matrix, query_vector, n_candidates, mask=mask)
+        if len(rows) < min(k, store.live_count):
+            rows = None
+    if rows is None:
+        rows, scores = top_k_similarities(matrix, query_vector, n_candidates, mask)
+
+    if rescore and len(rows):
+        rows = np.sort(rows)
+        scores = np.asarray(embeddings[rows]) @ query_vector
+        top = np.argsort(-scores, kind='stable')[:k]
+        rows, scores = rows[top], scores[top]
+
+    return [
+        {'item': store.items[row], 'embedding': embeddings[row], 'similarity': float(score), 'score': float(score)}
+        for row, score in zip(rows, scores)
+    ]
+
+
+def _lexical_hits(store, query, k, filters):
+    """Top-k rows of a resident store by BM25 score"""
+    rows, scores = store.lexical_index().search(query, k, _search_mask(store, filters))
+    embeddings = store.embeddings if store.embeddings.shape[1] else None
+    return [
+        {
+            'item': store.items[row],
+            'embedding': embeddings[row] if embeddings is not None else None,
+            'similarity': None,
+            'score': float(score)
+        }
+        for row, score in zip(rows, scores)
+    ]
+
+
+# Items-only resident store for BM25 over the database backend
+_db_lexical_cache = {'signature': None, 'store': None}
+
+
+def _database_lexical_store():
+    """Resident copy of the item_embeddings rows (no vectors), reloaded when the table changes"""
+    signature = vector_db.embeddings_signature()
+    with _store_cache_lock:
+        if _db_lexical_cache['signature'] != signature:
+            items = vector_db.load_embedding_items()
+            # Zero-width matrix - only the filter columns and BM25 index are used
+            _db_lexical_cache['store'] = ResidentStore({}, items, np.empty((len(items), 0), dtype=np.float32))
+            _db_lexical_cache['signature'] = signature
+        return _db_lexical_cache['store']
+
+
+def _fuse_rankings(rankings, n_results):
+    """
+    Reciprocal-rank fusion: each item scores sum(1 / (RRF_K + rank)) over
+    the rankings it appears in - no score calibration between BM25 and
+    cosine needed
+    """
+    fused = {}
+    for hits in rankings:
+        for rank, hit in enumerate(hits, start=1):
+            entry = fused.get(hit['item']['id'])
+            if entry is None:
+                entry = fused[hit['item']['id']] = dict(hit, score=0.0)
+            for key in ('embedding', 'similarity'):
+                if entry[key] is None:
+                    entry[key] = hit[key]
+            entry['score'] += 1.0 / (RRF_K + rank)
+    return sorted(fused.values(), key=lambda hit: -hit['score'])[:n_results]
+
+
+def search_memory(query, n_results=5, filters=None, mode=None):
     """
     Search vector store for similar items
 
@@ -234,79 +1347,82 @@ def search_memory(query, n_results=5, filters=None):
         query: Natural language query
         n_results: Number of results to return
         filters: Optional dict like {"category": "Betting", "type": "task"}
+        mode: 'vector', 'lexical' or 'hybrid' (defaults to SEARCH_MODE)
 
     Returns:
-        List of matching items with similarity scores
+        List of {'item', 'similarity', 'score'} best first - similarity is the
+        cosine similarity (None when unknown), score is what results are
+        ranked by (cosine, BM25 or fused rank score)
     """
-
-    if not VECTOR_STORE_PATH.exists():
-        raise Exception("Vector store not found. Run vectorize_all_data() first.")
-
-    # Load vector store
-    with open(VECTOR_STORE_PATH, 'r', encoding='utf-8') as f:
-        vector_store = json.load(f)
-
-    # Vectorize query via OpenAI API
-    print(f"[Search] Vectorizing query: '{query}'")
-    query_embedding = get_embedding(query)
-
-    # Calculate similarities for all items
-    results = []
-    for item in vector_store['items']:
-        # Apply filters if provided
-        if filters:
-            if 'category' in filters and filters['category']:
-                if not category_matches(filters['category'], item['category']):
-                    continue
-            if 'type' in filters and filters['type']:
-                if item['type'] != filters['type']:
-                    continue
-            if 'completed' in filters and filters['completed'] is not None:
-                if item['type'] == 'task' and item.get('completed') != filters['completed']:
-                    continue
-
-        # Calculate similarity
-        similarity = cosine_similarity(query_embedding, item['embedding'])
-
-        results.append({
-            'item': item,
-            'similarity': similarity
-        })
-
-    # Sort by similarity (highest first)
-    results.sort(key=lambda x: x['similarity'], reverse=True)
-
-    # Return top N results
-    top_results = results[:n_results]
-
-    print(f"[Search] Found {len(top_results)} results")
+    mode = (mode or SEARCH_MODE).lower()
+
+    # Vectorize query (in-memory LRU first, then OpenAI API)
+    query_vector = None
+    if mode != 'lexical':
+        print(f"[Search] Vectorizing query: '{query}'")
+        try:
+            query_vector = normalize_rows(get_query_embedding(query))
+        except Exception as e:
+            # Embedding API slow or down - answer from the local BM25 index instead
+            print(f"[Warning] Query embedding failed ({e}) - falling back to keyword search")
+            mode = 'lexical'
+
+    n_candidates = n_results * FUSION_CANDIDATE_FACTOR if mode == 'hybrid' else n_results
+    rankings = []
+
+    if VECTOR_STORE_BACKEND == 'database':
+        # Filters and top-k run in the database (pgvector) or on its filtered rows (SQLite)
+        if mode != 'lexical':
+            rankings.append([
+                {'item': item, 'embedding': embedding, 'similarity': similarity, 'score': similarity}
+                for item, embedding, similarity in vector_db.search_embeddings(query_vector, n_candidates, filters)
+            ])
+        if mode != 'vector':
+            rankings.append(_lexical_hits(_database_lexical_store(), query, n_candidates, filters))
+    else:
+        # Resident store for this process (reloaded only if the files changed)
+        store = get_vector_store()
+        if mode != 'lexical':
+            rankings.append(_vector_hits(store, query_vector, n_candidates, _search_mask(store, filters)))
+        if mode != 'vector':
+            rankings.append(_lexical_hits(store, query, n_candidates, filters))
+
+    hits = _fuse_rankings(rankings, n_results) if mode == 'hybrid' else rankings[0][:n_results]
+
+    # Embedding attached only for the returned rows
+    top_results = []
+    for hit in hits:
+        item = dict(hit['item'])
+        similarity = hit['similarity']
+        if hit['embedding'] is not None:
+            item['embedding'] = np.asarray(hit['embedding']).tolist()
+            if similarity is None and query_vector is not None:
+                similarity = float(np.dot(hit['embedding'], query_vector))
+        top_results.append({'item': item, 'similarity': similarity, 'score': hit['score']})
+
+    print(f"[Search] Found {len(top_results)} results ({mode})")
     for i, result in enumerate(top_results):
-        print(f"  {i+1}. [{result['item']['category']}] {result['item']['content'][:50]}... (similarity: {result['similarity']:.3f})")
+        print(f"  {i+1}. [{result['item']['category']}] {result['item']['content'][:50]}... (score: {result['score']:.3f})")
 
     return top_results
 
 
 def add_to_vector_store(item_id, item_type, category, content, **kwargs):
     """
-    Add a new item to vector store
-    Called when new tasks/notes are added to database
+    Add a task/note to the vector store, replacing any existing entry with the same id
+    Called when tasks/notes are added or updated in the database
     """
 
-    if not VECTOR_STORE_PATH.exists():
+    if not vector_store_exists():
         print("[Warning] Vector store not found. Run vectorize_all_data() first.")
         return
 
-    # Load vector store
-    with open(VECTOR_STORE_PATH, 'r', encoding='utf-8') as f:
-        vector_store = json.load(f)
-
-    # Create embedding text
-    embedding_text = f"{category}: {content}"
-    if item_type == 'task' and kwargs.get('due_date'):
-        embedding_text += f" (due: {kwargs['due_date']})"
+    # One-shot migration if only the legacy JSON store exists
+    if VECTOR_STORE_BACKEND != 'database' and not (EMBEDDINGS_PATH.exists() and METADATA_PATH.exists()):
+        migrate_legacy_store()
 
     # Generate embedding via OpenAI API
-    embedding = get_embedding(embedding_text)
+    embedding = get_embedding(build_embedding_text(item_type, category, content, kwargs.get('due_date')))
 
     # Create item
     new_item = {
@@ -314,24 +1430,18 @@ def add_to_vector_store(item_id, item_type, category, content, **kwargs):
         'type': item_type,
         'category': category,
         'content': content,
-        'created_date': datetime.now().isoformat(),
-        'embedding': embedding
+        'created_date': str(kwargs.get('created_date') or datetime.now().isoformat())
     }
 
     # Add task-specific fields
     if item_type == 'task':
         new_item['due_date'] = kwargs.get('due_date')
-        new_item['completed'] = kwargs.get('completed', False)
+        new_item['completed'] = bool(kwargs.get('completed', False))
 
-    # Add to vector store
-    vector_store['items'].append(new_item)
-    vector_store['metadata']['total_items'] = len(vector_store['items'])
+    # Upsert via the log segment - replaces any stored item with the same id
+    upsert_vector_item(new_item, embedding)
 
-    # Save
-    with open(VECTOR_STORE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(vector_store, f, indent=2)
-
-    print(f"[Vector Store] Added {item_type}_{item_id} to vector store")
+    print(f"[Vector Store] Upserted {item_type}_{item_id} in vector store")
 
 
 def main():
@@ -341,7 +1451,11 @@ def main():
     if len(sys.argv) < 2:
         print("Usage:")
         print("  python vector_store.py vectorize         - Vectorize all data")
+        print("  python vector_store.py sync              - Embed only new/changed rows, drop deleted ones")
         print("  python vector_store.py search '<query>'  - Search vector store")
+        print("  python vector_store.py migrate           - Convert vector_store.json to binary format")
+        print("  python vector_store.py compact           - Fold the append log into the base matrix")
+        print("  python vector_store.py migrate-db        - Copy the file store into the database table")
         print('Example: python vector_store.py search "what are my bets"')
         sys.exit(1)
 
@@ -351,6 +1465,21 @@ def main():
         force = '--force' in sys.argv
         vectorize_all_data(force=force)
 
+    elif command == 'sync':
+        sync_vector_store()
+
+    elif command == 'migrate':
+        if not LEGACY_VECTOR_STORE_PATH.exists():
+            print(f"Error: {LEGACY_VECTOR_STORE_PATH} not found")
+            sys.exit(1)
+        migrate_legacy_store()
+
+    elif command == 'compact':
+        compact_vector_store()
+
+    elif command == 'migrate-db':
+        migrate_to_database()
+
     elif command == 'search':
         if len(sys.argv) < 3:
             print("Error: Please provide a search query")
@@ -369,7 +1498,9 @@ def main():
             print(f"   Content: {item['content']}")
             if item['type'] == 'task' and item.get('due_date'):
                 print(f"   Due: {item['due_date']}")
-            print(f"   Similarity: {result['similarity']:.3f}")
+            if result['similarity'] is not None:
+                print(f"   Similarity: {result['similarity']:.3f}")
+            print(f"   Score: {result['score']:.3f}")
             print()
 
     else:
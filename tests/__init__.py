@@ -0,0 +1 @@
+# Makes tests a package so pytest puts the repo root on sys.path (scripts.* imports)
@@ -0,0 +1,93 @@
+"""
+Tests for the fast-path router
+Run with: python -m pytest tests
+
+LOGS must fast-route to the labelled tool; TASK_LIKE messages (plans,
+to-dos, questions) must always fall back to the LLM.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from scripts.fast_router import classify_message, fast_route
+
+# (expected tool, message) - past tense or quantity first
+LOGS = [
+    ('log_sleep', 'I slept 8 hours last night'),
+    ('log_sleep', 'slept 7.5 hours'),
+    ('log_sleep', 'got 6 hours of sleep yesterday'),
+    ('log_sleep', '7h30 sleep'),
+    ('log_water', '2 cups of water'),
+    ('log_water', 'drank 1 cup'),
+    ('log_water', 'had 3 cups of water today'),
+    ('log_water', "I've had two glasses of water"),
+    ('log_exercise', '1 hour of pickleball'),
+    ('log_exercise', 'played pickleball for 60 minutes'),
+    ('log_exercise', '30 min run this morning'),
+    ('log_exercise', 'half an hour of yoga'),
+    ('log_exercise', 'I just worked out for an hour'),
+    ('log_exercise', 'yesterday ran 30 min'),
+    ('log_exercise', '30m run'),
+    ('log_exercise', 'ran 1h 15m'),
+    ('log_sauna', '20 minutes in sauna'),
+    ('log_sauna', 'did 2 sauna sessions 15 minutes each'),
+    ('log_inbody', 'InBody: weight 174, SMM 84, PBF 15.2, ECW/TBW 0.385'),
+    ('log_inbody', 'inbody scan results: 172 lbs, smm 83.5, pbf 14.8%, ecw 0.39'),
+]
+
+# Plans, to-dos and questions that mention a health tool and a quantity
+TASK_LIKE = [
+    'drink 8 cups of water',
+    'drink 3 glasses of water today',
+    'get 8 hours of sleep',
+    'get 8 hours of sleep tonight',
+    'sleep 8 hours',
+    'go gym 1 hour',
+    'go to the gym for 45 minutes',
+    'do yoga 30 min',
+    'hit the gym for an hour',
+    'I have 1 hour for the gym',
+    'play pickleball for 60 minutes',
+    'run 30 min',
+    'walk 20 minutes after lunch',
+    'need to hit the gym tomorrow for an hour',
+    '30 min run tomorrow',
+    '8 cups of water a day',
+    'how many hours did I sleep last night',
+    'did I drink 2 cups of water today?',
+    'remind me to drink 2 cups of water',
+    'book sauna for 30 min',
+    'ran 5 m',
+    'walked 3 m this morning',
+]
+
+
+@pytest.mark.parametrize('tool, message', LOGS)
+def test_logs_fast_route(tool, message):
+    result = fast_route(message)
+    assert result is not None, message
+    assert result['tool'] == tool
+
+
+@pytest.mark.parametrize('message', TASK_LIKE)
+def test_task_like_messages_fall_back(message):
+    assert fast_route(message) is None
+
+
+def test_imperative_verbs_are_not_filler():
+    # Regression: these used to route at confidence 1.0
+    for message in ('drink 8 cups of water', 'do yoga 30 min', 'hit the gym for an hour'):
+        result, confidence = classify_message(message)
+        assert result is None and confidence == 0.0, message
+
+
+def test_extracted_parameters():
+    assert fast_route('slept 7.5 hours') == {'tool': 'log_sleep', 'hours': 7.5, 'date': None, 'notes': None}
+    assert fast_route('had 3 cups of water')['cups'] == 3
+    assert fast_route('did 2 sauna sessions 15 minutes each')['num_visits'] == 2
+
+    exercise = fast_route('yesterday ran 30 min')
+    assert exercise['activity_type'] == 'Running'
+    assert exercise['duration_minutes'] == 30
+    assert exercise['date'] == (datetime.now().date() - timedelta(days=1)).isoformat()